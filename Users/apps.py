@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Users'
+
+    def ready(self):
+        from .mail import EMAIL_TEMPLATES, get_email_template
+
+        # Compile email templates at startup instead of in the first request that sends one
+        for template_name in EMAIL_TEMPLATES:
+            get_email_template(template_name)
@@ -0,0 +1,37 @@
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser as BaseTokenUser
+
+
+class TokenUser(BaseTokenUser):
+    """
+    Lightweight user built from the claims added by Users.serializers.TokenObtainPairSerializer.
+    It has no database representation, so it can't be saved or used to check passwords.
+    """
+
+    @cached_property
+    def is_active(self):
+        # Tokens issued before the claim was added were only ever given to active users
+        return self.token.get('is_active', True)
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticates requests with the access token alone, without loading the UserAccount row.
+
+    Claims are copied into the token at login and read again from the database on every refresh,
+    so changes to the account (e.g. deactivation) apply once the access token expires and a
+    deactivated user can't refresh. Views that need the real model instance or must see
+    the account's current state, like ChangePasswordView, should set
+    rest_framework_simplejwt.authentication.JWTAuthentication as their authentication class.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user
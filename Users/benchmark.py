@@ -0,0 +1,402 @@
+"""
+Load test harness for the endpoints in Users/url.py, used by the benchmark_endpoints command.
+
+Every endpoint is driven by a scenario: concurrent clients send requests to a local WSGI server
+running the project against a throwaway test database, and the harness records latency, status
+codes and the number of SQL queries each request ran on the server.
+"""
+import http.client
+import json
+import math
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.db import connection, connections
+from django.urls import reverse
+from django_rest_passwordreset.models import ResetPasswordToken
+
+from .models import UserAccount
+
+PASSWORDS = ('Bench-password-1', 'Bench-password-2')
+
+
+#####################
+# Server and client #
+#####################
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class BenchmarkServer(ThreadingMixIn, WSGIServer):
+    """
+    WSGI server handling requests in a fixed set of threads, like a gunicorn worker with threads,
+    so database connections are reused between requests the same way they are in production.
+    """
+
+    def __init__(self, address, threads):
+        super().__init__(address, QuietRequestHandler)
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix='benchmark-server')
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+class QueryCountingApp:
+    """
+    WSGI application counting the SQL queries run while handling each request, by path.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.queries = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        # Connections are per thread, so this only counts this request's queries
+        with connection.execute_wrapper(counter):
+            response = self.application(environ, start_response)
+            # Content is rendered by the time the response is returned, but be safe with iterators
+            response = list(response)
+        with self._lock:
+            self.queries.setdefault(environ['PATH_INFO'], []).append(count[0])
+        return response
+
+    def take(self, path):
+        """
+        :return: Query counts recorded for the path since the last call
+        """
+        with self._lock:
+            return self.queries.pop(path, [])
+
+
+class Client:
+    """
+    Minimal HTTP client sending JSON requests to the benchmark server.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    def request(self, method, path, data=None, token=None):
+        """
+        :return: (status, decoded JSON body or None, seconds taken)
+        """
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = 'Bearer ' + token
+        body = json.dumps(data) if data is not None else None
+
+        started = time.perf_counter()
+        http_connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            http_connection.request(method, path, body=body, headers=headers)
+            response = http_connection.getresponse()
+            content = response.read()
+        finally:
+            http_connection.close()
+        elapsed = time.perf_counter() - started
+
+        try:
+            decoded = json.loads(content) if content else None
+        except ValueError:
+            decoded = None
+        return response.status, decoded, elapsed
+
+
+#############
+# Scenarios #
+#############
+
+class Scenario:
+    """
+    Drives one endpoint. setup() prepares the state of each client, including any requests which
+    are not measured, and request() sends one measured request.
+    """
+    name = None
+    url_name = None
+    method = 'POST'
+    expected_status = 200
+
+    def __init__(self, run_id):
+        # Keeps names created by different runs against the same database apart
+        self.run_id = run_id
+
+    @property
+    def path(self):
+        return reverse(self.url_name)
+
+    def setup(self, client, index, requests):
+        return {'user': 'bench-{}-{}'.format(self.run_id, index), 'password': PASSWORDS[0]}
+
+    def request(self, client, state, i):
+        raise NotImplementedError('subclasses of Scenario must provide a request() method')
+
+    def login(self, client, state):
+        status, body, _ = client.request('POST', reverse('login'),
+                                         {'username': state['user'], 'password': state['password']})
+        if status != 200:
+            raise RuntimeError('Benchmark login failed with HTTP {}'.format(status))
+        return body
+
+
+class LoginScenario(Scenario):
+    name = 'login'
+    url_name = 'login'
+
+    def request(self, client, state, i):
+        return client.request('POST', self.path, {'username': state['user'], 'password': state['password']})
+
+
+class RefreshScenario(Scenario):
+    name = 'refresh'
+    url_name = 'token_refresh'
+
+    def setup(self, client, index, requests):
+        state = super().setup(client, index, requests)
+        state['refresh'] = self.login(client, state)['refresh']
+        return state
+
+    def request(self, client, state, i):
+        result = client.request('POST', self.path, {'refresh': state['refresh']})
+        if result[0] == 200:
+            # Refresh tokens are rotated, keep using the newest one
+            state['refresh'] = result[1]['refresh']
+        return result
+
+
+class LogoutScenario(Scenario):
+    name = 'logout'
+    url_name = 'logout'
+
+    def setup(self, client, index, requests):
+        state = super().setup(client, index, requests)
+        state['tokens'] = [self.login(client, state)['refresh'] for _ in range(requests)]
+        return state
+
+    def request(self, client, state, i):
+        return client.request('POST', self.path, {'refresh': state['tokens'][i]})
+
+
+class RegisterScenario(Scenario):
+    name = 'register'
+    url_name = 'sign_up'
+    expected_status = 201
+
+    def request(self, client, state, i):
+        username = 'new-{}-{}'.format(state['user'], i)[:30]
+        return client.request('POST', self.path, {'username': username,
+                                                  'email': '{}@bench.local'.format(username),
+                                                  'password': PASSWORDS[0],
+                                                  'first_name': 'Bench',
+                                                  'last_name': 'User'})
+
+
+class ChangePasswordScenario(Scenario):
+    name = 'change_password'
+    url_name = 'change_password'
+    method = 'PUT'
+
+    def setup(self, client, index, requests):
+        state = super().setup(client, index, requests)
+        state['access'] = self.login(client, state)['access']
+        return state
+
+    def request(self, client, state, i):
+        new_password = PASSWORDS[(i + 1) % 2]
+        result = client.request('PUT', self.path, {'old_password': state['password'],
+                                                   'password': new_password,
+                                                   'password2': new_password}, token=state['access'])
+        if result[0] == 200:
+            state['password'] = new_password
+        return result
+
+
+class PasswordResetRequestScenario(Scenario):
+    name = 'password_reset'
+    url_name = 'password_reset:reset-password-request'
+
+    def request(self, client, state, i):
+        return client.request('POST', self.path, {'email': '{}@bench.local'.format(state['user'])})
+
+
+class PasswordResetValidateScenario(Scenario):
+    name = 'password_reset_validate'
+    url_name = 'password_reset:reset-password-validate'
+
+    def setup(self, client, index, requests):
+        state = super().setup(client, index, requests)
+        user = UserAccount.objects.get(username=state['user'])
+        state['keys'] = [ResetPasswordToken.objects.create(user=user).key for _ in range(requests)]
+        return state
+
+    def request(self, client, state, i):
+        return client.request('POST', self.path, {'token': state['keys'][i]})
+
+
+class PasswordResetConfirmScenario(PasswordResetValidateScenario):
+    name = 'password_reset_confirm'
+    url_name = 'password_reset:reset-password-confirm'
+
+    def setup(self, client, index, requests):
+        # A successful reset deletes every token of the user, so each request needs its own user
+        state = Scenario.setup(self, client, index, requests)
+        users = create_benchmark_users('{}-reset-{}'.format(self.run_id, index), requests)
+        state['keys'] = [ResetPasswordToken.objects.create(user=user).key for user in users]
+        return state
+
+    def request(self, client, state, i):
+        return client.request('POST', self.path, {'token': state['keys'][i], 'password': PASSWORDS[i % 2]})
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (
+    LoginScenario, RefreshScenario, LogoutScenario, RegisterScenario, ChangePasswordScenario,
+    PasswordResetRequestScenario, PasswordResetValidateScenario, PasswordResetConfirmScenario,
+)}
+
+
+###########
+# Harness #
+###########
+
+def percentile(values, percent):
+    """
+    :return: The percentile of the values using the nearest-rank method
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+def create_benchmark_users(run_id, count):
+    """
+    Creates benchmark users. All of them share a password hashed once, to keep setup quick.
+    :return: List of the created users
+    """
+    password = make_password(PASSWORDS[0])
+    return UserAccount.objects.bulk_create([
+        UserAccount(username='bench-{}-{}'.format(run_id, index),
+                    email='bench-{}-{}@bench.local'.format(run_id, index),
+                    password=password)
+        for index in range(count)
+    ])
+
+
+def run_scenario(scenario, client, app, concurrency, requests):
+    """
+    Runs `requests` measured requests for each of `concurrency` clients at once.
+    :return: Dictionary of results
+    """
+    with ThreadPoolExecutor(concurrency) as executor:
+        states = list(executor.map(lambda index: scenario.setup(client, index, requests), range(concurrency)))
+        app.take(scenario.path)
+        # Setup requests may run in the server threads; make sure their connections are released
+        connections.close_all()
+
+        def drive(state):
+            results = []
+            for i in range(requests):
+                status, _, elapsed = scenario.request(client, state, i)
+                results.append((status, elapsed))
+            return results
+
+        started = time.perf_counter()
+        results = [result for client_results in executor.map(drive, states) for result in client_results]
+        wall = time.perf_counter() - started
+
+    latencies = [elapsed * 1000 for _, elapsed in results]
+    errors = sum(1 for status, _ in results if status != scenario.expected_status)
+    queries = app.take(scenario.path)
+    return {
+        'path': scenario.path,
+        'requests': len(results),
+        'errors': errors,
+        'throughput_rps': round(len(results) / wall, 2) if wall else None,
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies), 2),
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(max(latencies), 2),
+        },
+        'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(scenario_names, concurrency, requests, server_threads, log=print):
+    """
+    Runs the scenarios one after the other against a local server. The database in use must be
+    a throwaway one, the benchmark_endpoints command creates a test database for it.
+
+    :param scenario_names: Names from SCENARIOS
+    :param concurrency: Number of concurrent clients
+    :param requests: Number of measured requests per client
+    :param server_threads: Number of threads handling requests in the server
+    :param log: Function called with progress messages
+    :return: Dictionary of results, ready to be written as JSON
+    """
+    run_id = str(int(time.time()))[-6:]
+    # One user per client
+    create_benchmark_users(run_id, concurrency)
+
+    app = QueryCountingApp(WSGIHandler())
+    server = BenchmarkServer(('127.0.0.1', 0), server_threads)
+    server.set_app(app)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    client = Client(*server.server_address[:2])
+
+    results = {}
+    try:
+        for name in scenario_names:
+            log('Running {} ...'.format(name))
+            results[name] = run_scenario(SCENARIOS[name](run_id), client, app, concurrency, requests)
+    finally:
+        server.shutdown()
+        server.server_close()
+        connections.close_all()
+
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'database': connection.vendor,
+            'concurrency': concurrency,
+            'requests_per_client': requests,
+            'server_threads': server_threads,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'results': results,
+    }
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class BlacklistCache:
+    """
+    Caches refresh token blacklist lookups by jti, so refresh and logout don't have to query
+    OutstandingToken/BlacklistedToken for every request.
+
+    There are two tiers. A bounded LRU in each process remembers blacklisted tokens, which stay
+    blacklisted until they expire. Django's cache framework is shared between processes and
+    remembers both answers. "Not blacklisted" is only kept for a short time, because the token can
+    be blacklisted at any moment, and never replaces an entry: a lookup which read the database
+    before a concurrent revocation must not undo the revocation's write. Every entry expires with
+    the token's `exp` claim.
+
+    Every place that blacklists tokens (logout, rotation on refresh and revoke_tokens) writes
+    through this cache, so it doesn't go stale. When the shared cache fails, lookups are answered
+    by the database instead of failing requests.
+    """
+    key_prefix = 'token-blacklist:'
+
+    def __init__(self, cache_alias='default', max_size=10000, negative_timeout=30):
+        """
+        :param cache_alias: Alias of the shared cache in settings.CACHES
+        :param max_size: Maximum number of blacklisted jtis remembered by each process
+        :param negative_timeout: Seconds to remember that a token is not blacklisted
+        """
+        self.cache_alias = cache_alias
+        self.max_size = max_size
+        self.negative_timeout = negative_timeout
+        # jti -> exp of blacklisted tokens, least recently used first
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _key(self, jti):
+        return self.key_prefix + jti
+
+    def _remember_locally(self, jti, exp):
+        with self._lock:
+            self._local[jti] = exp
+            self._local.move_to_end(jti)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+    def get(self, jti):
+        """
+        Looks up the jti in the local tier first, then in the shared cache.
+        :param jti: Token's jti claim
+        :return: True or False, or None if the answer isn't cached
+        """
+        with self._lock:
+            exp = self._local.get(jti)
+            if exp is not None:
+                if exp > time.time():
+                    self._local.move_to_end(jti)
+                    return True
+                # The token expired, it can't be used any more anyway
+                del self._local[jti]
+
+        # Blacklisted tokens are stored with their exp, others with 0
+        try:
+            exp = self.cache.get(self._key(jti))
+        except Exception:
+            logger.warning('Token blacklist cache unavailable, using the database', exc_info=True)
+            return None
+        if exp is None:
+            return None
+        if exp:
+            self._remember_locally(jti, exp)
+            return True
+        return False
+
+    def set(self, jti, exp, blacklisted):
+        """
+        Stores the lookup result for the given token.
+        :param jti: Token's jti claim
+        :param exp: Token's exp claim as a unix timestamp
+        :param blacklisted: Whether the token is blacklisted
+        """
+        self.set_many([(jti, exp)], blacklisted)
+
+    def set_many(self, tokens, blacklisted=True):
+        """
+        Stores the same lookup result for many tokens with a single shared cache call.
+        :param tokens: Iterable of (jti, exp) tuples, where exp is a unix timestamp
+        :param blacklisted: Whether the tokens are blacklisted
+        """
+        now = time.time()
+        values = {}
+        timeout = 0
+        for jti, exp in tokens:
+            if exp <= now:
+                # Expired tokens are rejected before the blacklist is checked
+                continue
+            timeout = max(timeout, exp - now)
+            if blacklisted:
+                self._remember_locally(jti, exp)
+                values[self._key(jti)] = exp
+            else:
+                values[self._key(jti)] = 0
+
+        if not values:
+            return
+        # Entries may outlive tokens which expire sooner than the last one, which is harmless
+        try:
+            if blacklisted:
+                self.cache.set_many(values, int(timeout) + 1)
+            else:
+                # add() leaves a "blacklisted" entry written since the database was read in place
+                timeout = int(min(timeout, self.negative_timeout)) + 1
+                for key, value in values.items():
+                    self.cache.add(key, value, timeout)
+        except Exception:
+            # The local tier and the database still have blacklisted tokens
+            logger.warning('Token blacklist cache unavailable, entries not stored', exc_info=True)
+
+    def clear_local(self):
+        """
+        Forgets everything in this process's tier.
+        """
+        with self._lock:
+            self._local.clear()
+
+
+def _create_blacklist_cache():
+    options = getattr(settings, 'TOKEN_BLACKLIST_CACHE', {})
+    return BlacklistCache(cache_alias=options.get('CACHE_ALIAS', 'default'),
+                          max_size=options.get('LOCAL_MAX_SIZE', 10000),
+                          negative_timeout=options.get('NEGATIVE_TIMEOUT', 30))
+
+
+blacklist_cache = _create_blacklist_cache()
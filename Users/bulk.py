@@ -0,0 +1,236 @@
+"""
+Bulk user import, used by the import_users command and the bulk registration endpoint.
+
+Rows are read one at a time from CSV or JSON Lines files and handled in batches: every batch is
+validated with UserAccountSerializer's rules, checked for taken usernames and emails with two
+queries, hashed on several cores and inserted with bulk_create in its own transaction. Invalid
+rows are reported with their line number and don't stop the other rows from being imported.
+"""
+import csv
+import json
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Upper
+from rest_framework.utils.field_mapping import get_unique_error_message
+
+from .hashing import get_hashing_processes, hashing_process_pool
+from .models import UserAccount
+from .serializers import UserAccountSerializer
+
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+
+def detect_format(filename):
+    """
+    :return: 'csv' or 'jsonl' by the extension of the file name
+    :raises ValueError: For other extensions
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    try:
+        return FORMATS[extension]
+    except KeyError:
+        raise ValueError('Unknown file type "{}", expected one of {}'.format(extension, ', '.join(FORMATS)))
+
+
+def read_rows(stream, file_format):
+    """
+    Reads the rows of a CSV file with a header line, or of a JSON Lines file with one object per line.
+    :param stream: Text stream, read as the rows are consumed
+    :param file_format: 'csv' or 'jsonl'
+    :return: Iterator of (line number, row). Rows which aren't valid JSON objects are None.
+    :raises ValueError: For other formats
+    """
+    if file_format == 'csv':
+        return _read_csv(stream)
+    if file_format == 'jsonl':
+        return _read_jsonl(stream)
+    raise ValueError('Unknown format "{}", expected csv or jsonl'.format(file_format))
+
+
+def _read_csv(stream):
+    reader = csv.DictReader(stream)
+    try:
+        for row in reader:
+            # Missing columns are left out so they are reported as required, extra ones are ignored
+            yield reader.line_num, {key: value for key, value in row.items() if key is not None and value is not None}
+    except csv.Error as e:
+        raise ValueError('Line {}: {}'.format(reader.line_num, e))
+
+
+def _read_jsonl(stream):
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+class BulkUserSerializer(UserAccountSerializer):
+    """
+    Validates a row with UserAccountSerializer's rules. Taken usernames and emails are checked for
+    the whole batch at once by import_users, instead of with two queries per row.
+    """
+
+    class Meta(UserAccountSerializer.Meta):
+        extra_kwargs = {
+            'username': {'validators': []},
+            'email': {'validators': []},
+            # UserAccountSerializer.create() requires them
+            'first_name': {'required': True},
+            'last_name': {'required': True},
+        }
+
+
+class BulkImportResult:
+    """
+    Number of rows read and users created, and the errors of the rows which weren't imported.
+    Only the first max_errors errors are kept, the others are counted.
+    """
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        # Set when the file can't be read any further, rows after it weren't imported
+        self.error = None
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'error': self.error,
+        }
+
+
+def _import_batch(batch, result, executor, processes):
+    errors = []
+    try:
+        _create_batch(batch, result, errors, executor, processes)
+    finally:
+        # Reported in the order of the file
+        for line, row_errors in sorted(errors, key=lambda error: error[0]):
+            result.add_error(line, row_errors)
+
+
+def _create_batch(batch, result, errors, executor, processes):
+    valid = []
+    for line, row in batch:
+        if row is None:
+            errors.append((line, {'non_field_errors': ['Invalid row, expected a JSON object.']}))
+            continue
+        serializer = BulkUserSerializer(data=row)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            # Normalized like make_users() does, to check if it is taken
+            data['email'] = UserAccount.objects.normalize_email(data['email'])
+            valid.append((line, data))
+        else:
+            errors.append((line, serializer.errors))
+    if not valid:
+        return
+
+    # Usernames and emails taken by existing users, or by an earlier row of the batch. Emails are
+    # compared in upper case, like the users_email_upper_uniq constraint does, on its index
+    taken = {
+        'username': set(UserAccount.objects.filter(username__in=[data['username'] for _, data in valid])
+                        .values_list('username', flat=True)),
+        'email': set(UserAccount.objects.annotate(email_upper=Upper('email'))
+                     .filter(email_upper__in=[data['email'].upper() for _, data in valid])
+                     .values_list('email_upper', flat=True)),
+    }
+    rows = []
+    for line, data in valid:
+        keys = {'username': data['username'], 'email': data['email'].upper()}
+        row_errors = {field: [get_unique_error_message(UserAccount._meta.get_field(field))]
+                      for field in ('username', 'email') if keys[field] in taken[field]}
+        if row_errors:
+            errors.append((line, row_errors))
+            continue
+        taken['username'].add(keys['username'])
+        taken['email'].add(keys['email'])
+        rows.append((line, data))
+    if not rows:
+        return
+
+    users = UserAccount.objects.make_users(
+        [(data['username'], data['email'], data['password'],
+          {'first_name': data['first_name'], 'last_name': data['last_name']}) for _, data in rows],
+        processes, executor)
+    try:
+        with transaction.atomic():
+            UserAccount.objects.bulk_create(users)
+        result.created += len(users)
+    except IntegrityError:
+        # A user registered since the check took a username or email, find the row one by one
+        for (line, _), user in zip(rows, users):
+            try:
+                with transaction.atomic():
+                    user.save()
+                result.created += 1
+            except IntegrityError:
+                errors.append((line, {'non_field_errors': ['A user with this username or email already exists.']}))
+
+
+def _read(rows, result, max_rows):
+    # Stops at the first row which can't be read, or after max_rows rows. The rows before are still imported
+    try:
+        for count, row in enumerate(rows, 1):
+            if max_rows is not None and count > max_rows:
+                result.error = 'The file has more than {} rows, the rows after them were not imported'.format(
+                    max_rows)
+                return
+            yield row
+    except ValueError as e:
+        result.error = str(e)
+
+
+def import_users(rows, batch_size=None, processes=None, max_errors=None, progress=None, max_rows=None):
+    """
+    Creates the users of the given rows, batch by batch. Every batch is committed on its own, so
+    the users of earlier batches stay when a later one fails.
+    :param rows: Iterator of (line number, row) as returned by read_rows(). Rows are dictionaries
+    with username, email, first_name, last_name and password, or None for unreadable rows.
+    :param batch_size: Rows per batch. Defaults to settings.BULK_IMPORT['BATCH_SIZE']
+    :param processes: Processes hashing the passwords, 0 for one per core. Defaults to
+    settings.HASHING_POOL['PROCESSES']
+    :param max_errors: Row errors kept in the result. Defaults to settings.BULK_IMPORT['MAX_ERRORS']
+    :param progress: Called with the result after every batch
+    :param max_rows: Rows imported at most, the others are left out and reported in result.error
+    :return: BulkImportResult
+    """
+    config = getattr(settings, 'BULK_IMPORT', {})
+    batch_size = batch_size or config.get('BATCH_SIZE', 1000)
+    processes = get_hashing_processes(processes)
+    result = BulkImportResult(config.get('MAX_ERRORS', 1000) if max_errors is None else max_errors)
+
+    # The hashing processes are started once for all the batches
+    with hashing_process_pool(processes) as executor:
+        rows = _read(rows, result, max_rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            result.rows += len(batch)
+            _import_batch(batch, result, executor, processes)
+            if progress is not None:
+                progress(result)
+    return result
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from drf_boilerplate.timing import timing
+
+
+class TunableHasherMixin:
+    """
+    Reads the hasher's cost parameters from settings.PASSWORD_HASHER_PARAMS[algorithm], falling
+    back to Django's defaults for the ones which aren't set.
+
+    Django rehashes a password on the next successful login whenever its stored parameters differ
+    from the current ones, so changing a cost (or the preferred hasher) migrates users as they log in.
+
+    Time spent hashing is added to the request's timings (see drf_boilerplate/timing.py).
+    """
+
+    def _param(self, name):
+        value = getattr(settings, 'PASSWORD_HASHER_PARAMS', {}).get(self.algorithm, {}).get(name)
+        return getattr(super(), name) if value is None else value
+
+    def encode(self, password, salt, *args, **kwargs):
+        with timing('hashing'):
+            return super().encode(password, salt, *args, **kwargs)
+
+    def verify(self, password, encoded):
+        with timing('hashing'):
+            return super().verify(password, encoded)
+
+    def harden_runtime(self, password, encoded):
+        with timing('hashing'):
+            return super().harden_runtime(password, encoded)
+
+
+class PBKDF2PasswordHasher(TunableHasherMixin, hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return self._param('iterations')
+
+
+class ScryptPasswordHasher(TunableHasherMixin, hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return self._param('work_factor')
+
+    @property
+    def block_size(self):
+        return self._param('block_size')
+
+    @property
+    def parallelism(self):
+        return self._param('parallelism')
+
+
+class Argon2PasswordHasher(TunableHasherMixin, hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return self._param('time_cost')
+
+    @property
+    def memory_cost(self):
+        return self._param('memory_cost')
+
+    @property
+    def parallelism(self):
+        return self._param('parallelism')
@@ -0,0 +1,174 @@
+import asyncio
+import contextvars
+import functools
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingPoolBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Server is busy, try again later.'
+    default_code = 'hashing_pool_busy'
+
+
+class HashingPool:
+    """
+    Runs blocking password hashing work for the async views in a bounded pool of threads, so
+    the event loop keeps accepting requests while passwords are hashed. Django's hashers spend
+    their time in hashlib/argon2 code which releases the GIL, so threads hash in parallel.
+
+    At most `max_workers` calls run at once and `max_queue` more wait for a free thread. Calls
+    beyond that fail straight away with HashingPoolBusy (HTTP 503) instead of piling up.
+
+    :param max_workers: Number of hashing threads. 0 runs calls with sync_to_async on Django's
+    single sync thread instead, e.g. in tests which need the test's database connection.
+    :param max_queue: Number of calls allowed to wait for a free thread
+    """
+
+    def __init__(self, max_workers=4, max_queue=64):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='hashing') if max_workers else None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self):
+        """
+        :return: Number of calls running or waiting for a thread
+        """
+        return self._pending
+
+    @staticmethod
+    def _call(func, *args, **kwargs):
+        # Pool threads live longer than a request, so clean up their database connections
+        # the same way Django does around every request
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Runs func(*args, **kwargs) in the pool and returns its result. Exceptions are raised as is.
+        :raises HashingPoolBusy: If the pool and its queue are full
+        """
+        if self._executor is None:
+            return await sync_to_async(func)(*args, **kwargs)
+
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise HashingPoolBusy()
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Run in a copy of the caller's context, like sync_to_async does, so context variables
+            # such as the request timings are visible in the pool thread
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor,
+                                              functools.partial(context.run, self._call, func, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+_hashing_pool = None
+_hashing_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """
+    :return: The process wide hashing pool configured by settings.HASHING_POOL
+    """
+    global _hashing_pool
+    with _hashing_pool_lock:
+        if _hashing_pool is None:
+            config = getattr(settings, 'HASHING_POOL', {})
+            _hashing_pool = HashingPool(max_workers=config.get('MAX_WORKERS', 4),
+                                        max_queue=config.get('MAX_QUEUE', 64))
+        return _hashing_pool
+
+
+@receiver(setting_changed)
+def _reset_hashing_pool(setting, **kwargs):
+    global _hashing_pool
+    if setting == 'HASHING_POOL':
+        _hashing_pool = None
+
+
+################
+# Bulk hashing #
+################
+
+# Batch jobs (imports, resets, test fixtures) hash many passwords at once. They run the hashes in
+# processes rather than threads, so they use every core even while the main process is busy
+# validating and inserting rows.
+
+
+def get_hashing_processes(processes=None):
+    """
+    :param processes: Number of processes, 0 for one per core. Defaults to settings.HASHING_POOL['PROCESSES']
+    :return: Number of processes bulk hashing should use
+    """
+    if multiprocessing.current_process().daemon:
+        # Daemonic processes, e.g. the workers of the parallel test runner, can't start processes
+        return 1
+    if processes is None:
+        processes = getattr(settings, 'HASHING_POOL', {}).get('PROCESSES', 0)
+    return processes or os.cpu_count() or 1
+
+
+@contextmanager
+def hashing_process_pool(processes=None):
+    """
+    Process pool to pass to hash_passwords() when hashing in several batches, so its processes
+    are started once. Yields None when a single process is configured.
+    :param processes: Number of processes, see get_hashing_processes()
+    """
+    processes = get_hashing_processes(processes)
+    if processes < 2:
+        yield None
+        return
+
+    # Imported here, the web workers only need it when a batch job runs
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(processes) as executor:
+        yield executor
+
+
+def _hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def hash_passwords(passwords, processes=None, executor=None):
+    """
+    Hashes the passwords with the preferred hasher, split evenly over a pool of processes.
+    :param passwords: List of raw passwords
+    :param processes: Number of processes, see get_hashing_processes()
+    :param executor: Pool from hashing_process_pool(processes). Without it a pool is started for this call.
+    :return: List of encoded passwords, in the same order
+    """
+    processes = get_hashing_processes(processes)
+    if processes < 2 or len(passwords) < 2:
+        return _hash_passwords(passwords)
+    if executor is None:
+        with hashing_process_pool(processes) as executor:
+            return hash_passwords(passwords, processes, executor)
+
+    size = math.ceil(len(passwords) / processes)
+    chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+    return [encoded for hashed in executor.map(_hash_passwords, chunks) for encoded in hashed]
@@ -0,0 +1,262 @@
+import atexit
+import html
+import logging
+import queue
+import re
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+RESET_PASSWORD_TEMPLATE = 'Users/email/user_reset_password.html'
+
+# Templates compiled when the app is loaded (see UsersConfig.ready)
+EMAIL_TEMPLATES = [RESET_PASSWORD_TEMPLATE]
+
+_LINK_RE = re.compile(r'<a\s[^>]*href="([^"]*)"[^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+_BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+
+
+@lru_cache(maxsize=None)
+def get_email_template(template_name):
+    """
+    Loads and compiles an email template once per process.
+    :param template_name: Template path, e.g. RESET_PASSWORD_TEMPLATE
+    :return: Compiled template
+    """
+    return get_template(template_name)
+
+
+def render_email(template_name, context):
+    """
+    Renders an HTML email and its plain text alternative from the same compiled template.
+    :param template_name: Template path, e.g. RESET_PASSWORD_TEMPLATE
+    :param context: Template context
+    :return: (text, html) tuple
+    """
+    body = get_email_template(template_name).render(context)
+    # Keep link targets in the text version, which has no markup to hold them. Entities escaped by
+    # the template, e.g. &amp; in the link, are turned back into the characters they stand for.
+    text = html.unescape(strip_tags(_LINK_RE.sub(r'\2 (\1)', body)))
+    text = _BLANK_LINES_RE.sub('\n\n', text).strip()
+    return text, body
+
+
+class BaseMailQueue:
+    """
+    Outbound mail queue. Views enqueue messages and return without waiting for the mail server.
+
+    :param backend: Dotted path of the email backend used for delivery. Defaults to settings.EMAIL_BACKEND.
+    :param max_retries: Number of times a failed message is retried before it is dropped
+    :param backoff: Seconds to wait before the first retry. Doubled on every further retry.
+    """
+
+    def __init__(self, backend=None, max_retries=3, backoff=1.0):
+        self.backend = backend
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def enqueue(self, message):
+        """
+        Queues an EmailMessage for delivery.
+        """
+        raise NotImplementedError('subclasses of BaseMailQueue must provide an enqueue() method')
+
+    def qsize(self):
+        """
+        :return: Number of messages waiting for delivery
+        """
+        raise NotImplementedError('subclasses of BaseMailQueue must provide a qsize() method')
+
+    def flush(self, timeout=None):
+        """
+        Delivers or waits for the delivery of every queued message.
+        :param timeout: Maximum number of seconds to wait, or None to wait until done
+        """
+        raise NotImplementedError('subclasses of BaseMailQueue must provide a flush() method')
+
+    def deliver(self, messages):
+        """
+        Sends the messages through a single connection, retrying failures with exponential backoff.
+        Every message has its own retries: one the server keeps refusing is dropped and the ones
+        queued behind it are still sent. When the connection itself can't be opened after the
+        retries, the remaining messages are dropped.
+        :param messages: List of EmailMessage objects
+        :return: Number of messages sent
+        """
+        pending = list(messages)
+        sent = 0
+        # Failed attempts of opening the connection, and of sending pending[0]
+        connect_attempt = 0
+        attempt = 0
+        connection = get_connection(self.backend)
+
+        while pending:
+            try:
+                connection.open()
+            except Exception:
+                connect_attempt += 1
+                logger.warning('Opening the email connection failed (attempt %s of %s)', connect_attempt,
+                               self.max_retries + 1, exc_info=True)
+                self._close(connection)
+                if connect_attempt > self.max_retries:
+                    logger.error('Dropping %s email(s) after %s failed connection attempts', len(pending),
+                                 connect_attempt)
+                    break
+                self._wait(connect_attempt)
+                continue
+            connect_attempt = 0
+
+            try:
+                while pending:
+                    # One message at a time so a failure never resends the ones already delivered
+                    sent += connection.send_messages(pending[:1]) or 0
+                    pending.pop(0)
+                    attempt = 0
+            except Exception:
+                attempt += 1
+                logger.warning('Sending email to %s failed (attempt %s of %s)', pending[0].to, attempt,
+                               self.max_retries + 1, exc_info=True)
+                self._close(connection)
+                if attempt > self.max_retries:
+                    logger.error('Dropping email to %s after %s failed attempts', pending.pop(0).to, attempt)
+                    attempt = 0
+                else:
+                    self._wait(attempt)
+
+        self._close(connection)
+        return sent
+
+    def _wait(self, attempt):
+        time.sleep(self.backoff * 2 ** (attempt - 1))
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            logger.debug('Closing email connection failed', exc_info=True)
+
+
+class LocMemMailQueue(BaseMailQueue):
+    """
+    Keeps messages in memory until flush() is called. Meant for tests, which can inspect
+    `messages` before anything is sent.
+    """
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.messages = []
+
+    def enqueue(self, message):
+        self.messages.append(message)
+
+    def qsize(self):
+        return len(self.messages)
+
+    def flush(self, timeout=None):
+        messages, self.messages = self.messages, []
+        self.deliver(messages)
+
+
+class ThreadedMailQueue(BaseMailQueue):
+    """
+    Delivers messages from a background thread in the web worker process. The thread picks up
+    whatever is queued, up to `batch_size` messages, and sends them through one connection.
+
+    :param max_size: Maximum number of queued messages. When the queue is full, new messages are
+    dropped with an error log instead of holding up the request.
+    :param batch_size: Maximum number of messages sent through one connection
+    """
+
+    def __init__(self, max_size=1000, batch_size=50, **options):
+        super().__init__(**options)
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_worker(self):
+        # Started on first use, so processes which never send mail (or fork later) don't run it
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name='mail-queue', daemon=True)
+                self._thread.start()
+
+    def _work(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.deliver(batch)
+            except Exception:
+                logger.exception('Email worker failed to deliver %s message(s)', len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def enqueue(self, message):
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            logger.error('Email queue is full, dropping message to %s', message.to)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def flush(self, timeout=None):
+        if self._thread is None:
+            return
+        # Queue.join() can't time out, so poll the number of unfinished messages instead
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+
+
+_mail_queue = None
+_mail_queue_lock = threading.Lock()
+
+
+def get_mail_queue():
+    """
+    :return: The process wide mail queue configured by settings.MAIL_QUEUE
+    """
+    global _mail_queue
+    with _mail_queue_lock:
+        if _mail_queue is None:
+            config = getattr(settings, 'MAIL_QUEUE', {})
+            queue_class = import_string(config.get('BACKEND', 'Users.mail.ThreadedMailQueue'))
+            _mail_queue = queue_class(**config.get('OPTIONS', {}))
+        return _mail_queue
+
+
+@receiver(setting_changed)
+def _reset_mail_queue(setting, **kwargs):
+    global _mail_queue
+    if setting in ('MAIL_QUEUE', 'EMAIL_BACKEND'):
+        _mail_queue = None
+    elif setting == 'TEMPLATES':
+        get_email_template.cache_clear()
+
+
+@atexit.register
+def _flush_on_exit():
+    # Give queued messages a chance to go out when the worker process shuts down
+    if _mail_queue is not None:
+        _mail_queue.flush(timeout=getattr(settings, 'MAIL_QUEUE', {}).get('SHUTDOWN_TIMEOUT', 10))
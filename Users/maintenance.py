@@ -0,0 +1,53 @@
+import time
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+PruneResult = namedtuple('PruneResult', ['outstanding', 'blacklisted', 'seconds'])
+
+
+def prune_expired_tokens(batch_size=1000, pause=0.0, now=None):
+    """
+    Deletes expired refresh tokens and their blacklist entries in small batches.
+
+    Every refresh adds an OutstandingToken row and blacklists the previous one, and expired tokens
+    are rejected before the blacklist is checked, so these rows are only dead weight once the token
+    expires. Each batch is its own short transaction, so it only locks the rows it deletes and
+    doesn't block logins or refreshes. This function can be called from any scheduler (cron,
+    Celery beat etc.); the prune_tokens management command wraps it.
+
+    Batches are found walking the primary key upwards. Refresh tokens have a fixed lifetime, so
+    expired tokens are the oldest rows and every batch reads from the start of the index instead
+    of scanning the table.
+
+    :param batch_size: Maximum number of tokens deleted per transaction
+    :param pause: Seconds to sleep between batches to leave room for other queries
+    :param now: Tokens which expired before this time are deleted. Defaults to the current time.
+    :return: PruneResult with the number of deleted rows of each table and the time it took
+    """
+    now = now or timezone.now()
+    started = time.monotonic()
+    outstanding_deleted = blacklisted_deleted = 0
+    last_pk = 0
+
+    while True:
+        token_ids = list(OutstandingToken.objects
+                         .filter(pk__gt=last_pk, expires_at__lt=now)
+                         .order_by('pk')
+                         .values_list('pk', flat=True)[:batch_size])
+        if not token_ids:
+            break
+
+        with transaction.atomic():
+            blacklisted_deleted += BlacklistedToken.objects.filter(token_id__in=token_ids).delete()[0]
+            outstanding_deleted += OutstandingToken.objects.filter(pk__in=token_ids).delete()[0]
+
+        last_pk = token_ids[-1]
+        if len(token_ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    return PruneResult(outstanding_deleted, blacklisted_deleted, time.monotonic() - started)
@@ -0,0 +1,151 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from Users.benchmark import git_revision, percentile
+from Users.models import UserAccount
+
+CONSTRAINT_NAME = 'users_email_upper_uniq'
+
+# Querysets measured, by lookup: the case-insensitive one of password reset and email login, and
+# the exact one served by the unique index on email for reference
+LOOKUPS = {
+    'email__iexact': lambda email: UserAccount.objects.filter(email__iexact=email.upper()),
+    'email': lambda email: UserAccount.objects.filter(email=email),
+}
+
+
+class Command(BaseCommand):
+    help = ('Fills a throwaway test database with users and times the case-insensitive email lookup of '
+            'password reset and email login, without and with the index of the users_email_upper_uniq '
+            'constraint.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000000,
+                            help='Number of users in the table.')
+        parser.add_argument('--lookups', type=int, default=100,
+                            help='Number of measured lookups of random users, for each lookup and index state.')
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Users inserted per query while filling the table.')
+        parser.add_argument('--output', default=None,
+                            help='Writes the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['lookups'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--users, --lookups and --batch-size must be at least 1')
+
+        report = self._run(options)
+
+        self._print(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write('Results written to {}'.format(options['output']))
+
+    def _run(self, options):
+        # A file rather than memory, millions of rows behave differently on disk
+        sqlite_file = None
+        if connection.vendor == 'sqlite':
+            sqlite_file = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False).name
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = sqlite_file
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            constraint = next(constraint for constraint in UserAccount._meta.constraints
+                              if constraint.name == CONSTRAINT_NAME)
+            # The table is filled without the constraint's index, which is faster, and it is built afterwards
+            with connection.schema_editor() as editor:
+                editor.remove_constraint(UserAccount, constraint)
+            fill_seconds = self._fill(options['users'], options['batch_size'])
+
+            results = {'without_index': self._measure(options['users'], options['lookups'])}
+            self.stdout.write('Building {} ...'.format(CONSTRAINT_NAME))
+            started = time.perf_counter()
+            with connection.schema_editor() as editor:
+                editor.add_constraint(UserAccount, constraint)
+            index_seconds = time.perf_counter() - started
+            results['with_index'] = self._measure(options['users'], options['lookups'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if sqlite_file and os.path.exists(sqlite_file):
+                os.remove(sqlite_file)
+
+        return {
+            'meta': {
+                'revision': git_revision(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'database': connection.vendor,
+                'users': options['users'],
+                'lookups': options['lookups'],
+                'fill_s': round(fill_seconds, 2),
+                'index_build_s': round(index_seconds, 2),
+            },
+            'results': results,
+        }
+
+    def _fill(self, count, batch_size):
+        """
+        Inserts the users in batches. They share a password hashed once.
+        :return: Seconds taken
+        """
+        password = make_password('Bench-password-1')
+        started = time.perf_counter()
+        for start in range(0, count, batch_size):
+            UserAccount.objects.bulk_create([
+                UserAccount(username='user{}'.format(i), email='user{}@example.com'.format(i), password=password)
+                for i in range(start, min(start + batch_size, count))
+            ])
+            if (start // batch_size) % 20 == 19:
+                self.stdout.write('{} users inserted'.format(start + batch_size))
+        # Fresh statistics, or the planner may not pick the index
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return time.perf_counter() - started
+
+    def _measure(self, count, lookups):
+        """
+        Times lookups of random users.
+        :return: {lookup: {'plan', 'latency_ms'}}
+        """
+        rng = random.Random(0)
+        emails = ['user{}@example.com'.format(rng.randrange(count)) for _ in range(lookups)]
+        results = {}
+        for name, lookup in LOOKUPS.items():
+            latencies = []
+            for email in emails:
+                started = time.perf_counter()
+                users = list(lookup(email))
+                latencies.append((time.perf_counter() - started) * 1000)
+                if len(users) != 1:
+                    raise CommandError('{} found {} users for {}'.format(name, len(users), email))
+            results[name] = {
+                'plan': lookup(emails[0]).explain(),
+                'latency_ms': {
+                    'mean': round(statistics.mean(latencies), 3),
+                    'p50': round(percentile(latencies, 50), 3),
+                    'p95': round(percentile(latencies, 95), 3),
+                    'p99': round(percentile(latencies, 99), 3),
+                },
+            }
+        return results
+
+    def _print(self, report):
+        meta = report['meta']
+        self.stdout.write('{} users on {}, filled in {:.1f}s, {} built in {:.1f}s'.format(
+            meta['users'], meta['database'], meta['fill_s'], CONSTRAINT_NAME, meta['index_build_s']))
+        self.stdout.write('{:<16} {:<16} {:>10} {:>10} {:>10}'.format('index', 'lookup', 'p50 ms', 'p95 ms',
+                                                                     'p99 ms'))
+        for state, results in report['results'].items():
+            for name, result in results.items():
+                latency = result['latency_ms']
+                self.stdout.write('{:<16} {:<16} {:>10.3f} {:>10.3f} {:>10.3f}'.format(
+                    state.replace('_', ' '), name, latency['p50'], latency['p95'], latency['p99']))
+                for line in result['plan'].splitlines():
+                    self.stdout.write('    {}'.format(line))
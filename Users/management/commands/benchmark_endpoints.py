@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from Users.benchmark import SCENARIOS, run_benchmark
+
+
+class Command(BaseCommand):
+    help = ('Load tests the account endpoints with concurrent clients against a local server and a throwaway '
+            'test database, and reports throughput, latency percentiles and queries per request.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*',
+                            help='Scenarios to run: {}. Defaults to all of them.'.format(', '.join(SCENARIOS)))
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Number of concurrent clients.')
+        parser.add_argument('--requests', type=int, default=25,
+                            help='Number of measured requests sent by each client per scenario.')
+        parser.add_argument('--server-threads', type=int, default=None,
+                            help='Number of threads handling requests in the server. Defaults to --concurrency.')
+        parser.add_argument('--output', default=None,
+                            help='Writes the results as JSON to this file.')
+        parser.add_argument('--compare', default=None,
+                            help='JSON file of an earlier run to compare the results with.')
+
+    def handle(self, *args, **options):
+        scenarios = options['scenarios'] or list(SCENARIOS)
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError('Unknown scenario(s): {}'.format(', '.join(sorted(unknown))))
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency and --requests must be at least 1')
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        report = self._run(scenarios, options)
+
+        self._print(report, baseline)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write('Results written to {}'.format(options['output']))
+
+    def _run(self, scenarios, options):
+        # Server threads need to share the database, which an in-memory SQLite database can't do
+        sqlite_file = None
+        if connection.vendor == 'sqlite':
+            sqlite_file = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False).name
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = sqlite_file
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Throttling would reject most of the requests, and no email should leave the machine
+            rest_framework = dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={})
+            with override_settings(REST_FRAMEWORK=rest_framework,
+                                   ALLOWED_HOSTS=['127.0.0.1', 'localhost'],
+                                   EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+                return run_benchmark(scenarios, options['concurrency'], options['requests'],
+                                     options['server_threads'] or options['concurrency'],
+                                     log=self.stdout.write)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if sqlite_file and os.path.exists(sqlite_file):
+                os.remove(sqlite_file)
+
+    def _print(self, report, baseline):
+        meta = report['meta']
+        self.stdout.write('{} clients x {} requests on {} ({} server threads)'.format(
+            meta['concurrency'], meta['requests_per_client'], meta['database'], meta['server_threads']))
+        self.stdout.write('{:<24} {:>6} {:>6} {:>9} {:>9} {:>9} {:>9} {:>8}'.format(
+            'scenario', 'reqs', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries'))
+
+        previous = baseline['results'] if baseline else {}
+        for name, result in report['results'].items():
+            latency = result['latency_ms']
+            line = '{:<24} {:>6} {:>6} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>8}'.format(
+                name, result['requests'], result['errors'], result['throughput_rps'],
+                latency['p50'], latency['p95'], latency['p99'], result['queries_per_request'])
+            style = self.style.ERROR if result['errors'] else (lambda text: text)
+            self.stdout.write(style(line))
+
+            if name in previous:
+                before = previous[name]
+                self.stdout.write('{:<24} {:>13} {:>9} {:>9} {:>9} {:>9} {:>8}'.format(
+                    '  vs {}'.format(baseline['meta'].get('revision') or 'baseline'), '',
+                    _change(before['throughput_rps'], result['throughput_rps']),
+                    _change(before['latency_ms']['p50'], latency['p50']),
+                    _change(before['latency_ms']['p95'], latency['p95']),
+                    _change(before['latency_ms']['p99'], latency['p99']),
+                    _change(before['queries_per_request'], result['queries_per_request'])))
+
+
+def _change(before, after):
+    """
+    :return: Relative change from before to after, formatted as a signed percentage
+    """
+    if not before or after is None:
+        return '-'
+    return '{:+.0%}'.format((after - before) / before)
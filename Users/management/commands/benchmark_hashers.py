@@ -0,0 +1,91 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils.crypto import get_random_string
+from django.utils.module_loading import import_string
+
+
+def _hash_for(algorithm, params, seconds):
+    """
+    Hashes random passwords for the given number of seconds in the current process.
+    :return: Number of hashes computed
+    """
+    with override_settings(PASSWORD_HASHER_PARAMS=params):
+        hasher = get_hasher(algorithm)
+        password = get_random_string(16)
+        count = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            hasher.encode(password, hasher.salt())
+            count += 1
+    return count
+
+
+class Command(BaseCommand):
+    help = ('Measures password hashes per second per core for each hasher profile in '
+            'settings.PASSWORD_HASHER_PROFILES, with the cost parameters from settings.PASSWORD_HASHER_PARAMS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('profiles', nargs='*',
+                            help='Profiles to benchmark. Defaults to all of them.')
+        parser.add_argument('--seconds', type=float, default=3.0,
+                            help='How long to hash for each profile.')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Number of processes hashing in parallel, up to one per core.')
+        parser.add_argument('--param', action='append', default=[], metavar='ALGORITHM.NAME=VALUE',
+                            help='Overrides a cost parameter, e.g. --param argon2.time_cost=3. Can be repeated.')
+
+    def _params(self, overrides):
+        params = {algorithm: dict(values) for algorithm, values in settings.PASSWORD_HASHER_PARAMS.items()}
+        for override in overrides:
+            try:
+                name, value = override.split('=', 1)
+                algorithm, param = name.split('.', 1)
+                params.setdefault(algorithm, {})[param] = int(value)
+            except ValueError:
+                raise CommandError('Invalid --param "{}", expected ALGORITHM.NAME=VALUE'.format(override))
+        return params
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or list(settings.PASSWORD_HASHER_PROFILES)
+        unknown = set(profiles) - set(settings.PASSWORD_HASHER_PROFILES)
+        if unknown:
+            raise CommandError('Unknown profile(s): {}'.format(', '.join(sorted(unknown))))
+
+        processes = options['processes']
+        seconds = options['seconds']
+        params = self._params(options['param'])
+        self.stdout.write('Hashing for {}s with {} process(es) on {} core(s)'.format(
+            seconds, processes, os.cpu_count()))
+
+        # A single process hashes in this one, which also works where processes can't be started
+        with ProcessPoolExecutor(max_workers=processes) if processes > 1 else nullcontext() as executor:
+            for profile in profiles:
+                hasher_class = import_string(settings.PASSWORD_HASHER_PROFILES[profile])
+                algorithm = hasher_class.algorithm
+                try:
+                    hasher_class().encode('warm-up', hasher_class().salt())
+                except ValueError as e:
+                    # e.g. argon2-cffi is not installed
+                    self.stdout.write(self.style.WARNING('{:<8} skipped: {}'.format(profile, e)))
+                    continue
+
+                with override_settings(PASSWORD_HASHER_PARAMS=params):
+                    cost = get_hasher(algorithm).safe_summary(get_hasher(algorithm).encode('x', 'saltsaltsalt'))
+                cost = {key: value for key, value in cost.items() if key not in ('algorithm', 'salt', 'hash')}
+
+                if executor is None:
+                    counts = [_hash_for(algorithm, params, seconds)]
+                else:
+                    counts = list(executor.map(_hash_for, [algorithm] * processes, [params] * processes,
+                                               [seconds] * processes))
+                per_core = sum(counts) / seconds / processes
+                self.stdout.write('{:<8} {:>10.1f} hashes/s per core {:>10.1f} hashes/s total {:>8.1f} ms/hash  {}'.format(
+                    profile, per_core, per_core * processes, 1000 / per_core if per_core else 0,
+                    ', '.join('{}={}'.format(key, value) for key, value in cost.items())))
@@ -0,0 +1,64 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Users.bulk import detect_format, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Creates users from a CSV file with a header line, or a JSON Lines file with one object per line. '
+            'Rows need username, email, first_name, last_name and password. Rows with errors are reported '
+            'by line number and skipped, the others are created.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path',
+                            help='File to import, or - to read standard input.')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), default=None,
+                            help='File format. Defaults to the one of the file extension.')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Rows per batch. Defaults to settings.BULK_IMPORT['BATCH_SIZE'].")
+        parser.add_argument('--processes', type=int, default=None,
+                            help="Processes hashing the passwords, 0 for one per core. "
+                                 "Defaults to settings.HASHING_POOL['PROCESSES'].")
+        parser.add_argument('--errors', default=None,
+                            help='Writes the errors of all the rows, one JSON object per line, to this file.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if options['format'] is None and path == '-':
+            raise CommandError('--format is needed to read standard input')
+        try:
+            file_format = options['format'] or detect_format(path)
+        except ValueError as e:
+            raise CommandError(e)
+
+        started = time.perf_counter()
+
+        def progress(result):
+            self.stdout.write('{} rows, {} created, {} failed, {:.0f} rows/s'.format(
+                result.rows, result.created, result.failed, result.rows / (time.perf_counter() - started)))
+
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        try:
+            # Every error is kept when they are written to a file
+            result = import_users(read_rows(stream, file_format), batch_size=options['batch_size'],
+                                  processes=options['processes'],
+                                  max_errors=sys.maxsize if options['errors'] else None, progress=progress)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if options['errors']:
+            with open(options['errors'], 'w') as f:
+                for error in result.errors:
+                    f.write(json.dumps(error) + '\n')
+        else:
+            for error in result.errors:
+                self.stdout.write(self.style.WARNING('Line {line}: {errors}'.format(**error)))
+
+        self.stdout.write(self.style.SUCCESS('Created {} of {} users in {:.1f}s, {} rows failed'.format(
+            result.created, result.rows, time.perf_counter() - started, result.failed)))
+        if result.error:
+            raise CommandError('Stopped reading the file: {}'.format(result.error))
@@ -0,0 +1,173 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a new Python process: loads the project the way a worker does and sends it two requests,
+# after sending one to a copy of the process forked once the project is loaded
+WORKER_SCRIPT = '''
+import io, json, os, sys, time
+from wsgiref.util import setup_testing_defaults
+phases = {}
+previous = time.perf_counter()
+
+
+def mark(phase):
+    global previous
+    now = time.perf_counter()
+    phases[phase] = round((now - previous) * 1000, 2)
+    previous = now
+
+
+def send_request(statuses):
+    environ = {'REQUEST_METHOD': sys.argv[1], 'PATH_INFO': sys.argv[2], 'HTTP_HOST': host,
+               'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO()}
+    setup_testing_defaults(environ)
+    response = application(environ, lambda status, headers, exc_info=None: statuses.append(int(status[:3])))
+    b''.join(response)
+    getattr(response, 'close', lambda: None)()
+
+
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+mark('settings')
+django.setup(set_prefix=False)
+mark('apps')
+from django.utils.module_loading import import_string
+application = import_string(settings.WSGI_APPLICATION)
+mark('application')
+host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+
+# A worker forked after the project was loaded, as gunicorn does with preload_app
+preloaded = None
+if hasattr(os, 'fork'):
+    read_end, write_end = os.pipe()
+    forked = time.perf_counter()
+    if os.fork() == 0:
+        send_request([])
+        os.write(write_end, str(time.perf_counter() - forked).encode())
+        os._exit(0)
+    os.wait()
+    preloaded = round(float(os.read(read_end, 64)) * 1000, 2)
+    previous = time.perf_counter()
+
+statuses = []
+send_request(statuses)
+mark('first_request')
+send_request(statuses)
+mark('second_request')
+print(json.dumps({'phases': phases, 'preloaded': preloaded, 'status': statuses[0], 'modules': len(sys.modules)}))
+'''
+
+PHASES = ('settings', 'apps', 'application', 'first_request', 'second_request')
+
+# Phases a worker goes through before its first response is sent
+STARTUP_PHASES = PHASES[:-1]
+
+_IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$')
+
+
+def aggregate_import_times(lines):
+    """
+    Sums the self time of the imports reported by python -X importtime by top-level package.
+    :param lines: stderr lines of the process
+    :return: {package: {'modules': count, 'ms': self time}}
+    """
+    packages = defaultdict(lambda: {'modules': 0, 'ms': 0.0})
+    for line in lines:
+        match = _IMPORT_TIME_RE.match(line.rstrip())
+        if match:
+            package = packages[match.group(3).split('.')[0]]
+            package['modules'] += 1
+            package['ms'] += int(match.group(1)) / 1000
+    return dict(packages)
+
+
+class Command(BaseCommand):
+    help = ('Starts the project in new processes the way a worker does and reports the time to its first '
+            'response by startup phase, and the import time by top-level package.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/account/login/',
+                            help='Path of the requests sent to the worker.')
+        parser.add_argument('--method', default='GET',
+                            help='Method of the requests sent to the worker.')
+        parser.add_argument('--runs', type=int, default=5,
+                            help='Number of worker processes started. The fastest one is reported.')
+        parser.add_argument('--top', type=int, default=15,
+                            help='Number of packages listed by import time.')
+        parser.add_argument('--target', type=float, default=750.0,
+                            help='Target time to the first response in milliseconds. The command fails above it.')
+        parser.add_argument('--output', default=None,
+                            help='Writes the results as JSON to this file.')
+
+    def _start_worker(self, options, *python_options):
+        """
+        Starts the project in a new process with the current settings module and environment.
+        :return: (results printed by the worker, its stderr)
+        """
+        result = subprocess.run(
+            [sys.executable, *python_options, '-c', WORKER_SCRIPT, options['method'].upper(), options['path']],
+            capture_output=True, text=True, cwd=settings.PROJECT_ROOT, env=os.environ.copy())
+        if result.returncode != 0:
+            raise CommandError('The worker process failed:\n{}'.format(result.stderr[-2000:]))
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1')
+
+        # Import times are measured in a run of their own, -X importtime slows the imports down
+        runs = [self._start_worker(options)[0] for _ in range(options['runs'])]
+        best = min(runs, key=lambda run: sum(run['phases'][phase] for phase in STARTUP_PHASES))
+        _, stderr = self._start_worker(options, '-X', 'importtime')
+        packages = aggregate_import_times(stderr.splitlines())
+
+        report = {
+            'time_to_first_request_ms': round(sum(best['phases'][phase] for phase in STARTUP_PHASES), 2),
+            'target_ms': options['target'],
+            'phases_ms': best['phases'],
+            'preloaded_first_request_ms': best['preloaded'],
+            'status': best['status'],
+            'modules': best['modules'],
+            'import_ms': round(sum(package['ms'] for package in packages.values()), 2),
+            'packages': packages,
+        }
+        self._print(report, options)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write('Results written to {}'.format(options['output']))
+
+        if report['time_to_first_request_ms'] > options['target']:
+            raise CommandError('The time to the first request is over the target of {:.0f} ms'.format(
+                options['target']))
+
+    def _print(self, report, options):
+        self.stdout.write('{} {} answered {} (best of {} runs, {} modules loaded)'.format(
+            options['method'].upper(), options['path'], report['status'], options['runs'], report['modules']))
+        for phase in PHASES:
+            self.stdout.write('  {:<16} {:>9.1f} ms'.format(phase.replace('_', ' '), report['phases_ms'][phase]))
+
+        line = 'Time to first request: {:.1f} ms, target {:.0f} ms'.format(
+            report['time_to_first_request_ms'], report['target_ms'])
+        if report['time_to_first_request_ms'] > report['target_ms']:
+            self.stdout.write(self.style.ERROR(line))
+        else:
+            self.stdout.write(self.style.SUCCESS(line))
+        if report['preloaded_first_request_ms'] is not None:
+            self.stdout.write('Time to first request of a worker forked after loading the project (preload_app): '
+                              '{:.1f} ms'.format(report['preloaded_first_request_ms']))
+
+        self.stdout.write('Import time by package, {:.1f} ms in total with -X importtime:'.format(report['import_ms']))
+        self.stdout.write('  {:<32} {:>7} {:>9} {:>6}'.format('package', 'modules', 'ms', '%'))
+        packages = sorted(report['packages'].items(), key=lambda item: item[1]['ms'], reverse=True)
+        for name, package in packages[:options['top']]:
+            self.stdout.write('  {:<32} {:>7} {:>9.1f} {:>5.1f}%'.format(
+                name, package['modules'], package['ms'], 100 * package['ms'] / report['import_ms']))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from Users.maintenance import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired refresh tokens and their blacklist entries in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Maximum number of tokens deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches.')
+
+    def handle(self, *args, **options):
+        result = prune_expired_tokens(batch_size=options['batch_size'], pause=options['pause'])
+
+        deleted = result.outstanding + result.blacklisted
+        rate = deleted / result.seconds if result.seconds else 0
+        self.stdout.write(self.style.SUCCESS(
+            'Deleted {} outstanding and {} blacklisted tokens in {:.2f}s ({:.0f} rows/s)'.format(
+                result.outstanding, result.blacklisted, result.seconds, rate)))
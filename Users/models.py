@@ -1,12 +1,17 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.functions import Upper
+from django.db.models.lookups import Exact, IExact
 from django.contrib.auth.models import BaseUserManager, AbstractUser
 from django.core.mail import EmailMultiAlternatives
-from django.db.models import signals
 from django.dispatch import receiver
-from django.template.loader import render_to_string
 from django_rest_passwordreset.signals import reset_password_token_created
 from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
 from drf_boilerplate.settings import common
+from .blacklist import blacklist_cache
+from .hashing import hash_passwords
+from .mail import RESET_PASSWORD_TEMPLATE, get_mail_queue, render_email
+from .signals import password_changed
 
 
 class UserManager(BaseUserManager):
@@ -46,6 +51,50 @@ class UserManager(BaseUserManager):
         # Returns the user object which in our API is going to be the JWT token
         return user
 
+    def get_by_natural_key(self, username):
+        """
+        Finds the user logging in. When users log in with their email, it is matched case-insensitively
+        like password reset does, on the index of the users_email_upper_uniq constraint.
+        :param username: Username, or email when USERNAME_FIELD is email
+        :return: User object
+        """
+        if self.model.USERNAME_FIELD != 'email':
+            return super().get_by_natural_key(username)
+        return self.get(email__iexact=username)
+
+    def make_users(self, users, processes=None, executor=None):
+        """
+        Builds unsaved users, hashing their passwords in parallel on a pool of processes. Much
+        faster than create_user() for many users, e.g. imports or test fixtures.
+        :param users: Iterable of (username, email, password) or (username, email, password, other_fields)
+        :param processes: Number of hashing processes, 0 for one per core. Defaults to
+        settings.HASHING_POOL['PROCESSES'].
+        :param executor: Pool from Users.hashing.hashing_process_pool(processes), to reuse its processes
+        over several calls
+        :return: List of unsaved User objects, in the same order
+        """
+        users = [(user[0], user[1], user[2], user[3] if len(user) > 3 else {}) for user in users]
+        for username, email, password, _ in users:
+            if not username:
+                raise ValueError('Users must have username')
+            if not email:
+                raise ValueError('Users must have email')
+            if not password:
+                raise ValueError('Users must have a password')
+
+        passwords = hash_passwords([password for _, _, password, _ in users], processes, executor)
+        return [self.model(email=self.normalize_email(email), username=username, password=encoded,
+                           **other_fields)
+                for (username, email, _, other_fields), encoded in zip(users, passwords)]
+
+    def create_users(self, users, processes=None, executor=None, batch_size=None):
+        """
+        Creates many users with bulk INSERTs, hashing their passwords in parallel. See make_users().
+        :param batch_size: Users inserted per query, all of them by default
+        :return: List of saved User objects, in the same order
+        """
+        return self.bulk_create(self.make_users(users, processes, executor), batch_size=batch_size)
+
     def create_superuser(self, username, email, password, **other_fields):
         """
         This is a custom model registration class that creates a super_user
@@ -85,13 +134,65 @@ class UserAccount(AbstractUser):
 
     # Telling the model to use our custom registration manager we created above
     objects = UserManager()
-    # Set default field logged in with as username. Can be changed to email.
-    USERNAME_FIELD = 'username'
-    REQUIRED_FIELDS = ['email']
+    # Users log in with their username, or with their email when LOGIN_WITH_EMAIL is on
+    USERNAME_FIELD = 'email' if getattr(settings, 'LOGIN_WITH_EMAIL', False) else 'username'
+    REQUIRED_FIELDS = ['username'] if USERNAME_FIELD == 'email' else ['email']
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # Emails only differing by case belong to the same person. Its index serves the
+            # case-insensitive email lookups of password reset and email login, which the unique
+            # index on email can't (see UpperIExact)
+            models.UniqueConstraint(Upper('email'), name='users_email_upper_uniq',
+                                    violation_error_message='A user with this email already exists.'),
+        ]
 
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored hash so save() can tell if the password really changed.
+        # It is missing when the password field was deferred.
+        instance._loaded_password = instance.__dict__.get('password')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the user and sends the password_changed signal when set_password() was called
+        since the last save. Other saves, like the last_login update on every login, don't
+        cost any extra queries.
+        """
+        update_fields = kwargs.get('update_fields')
+        # AbstractBaseUser keeps the raw password in _password until the next save. Hash
+        # upgrades done by check_password() clear it first, so they don't count as a change.
+        changed = (not self._state.adding
+                   and self._password is not None
+                   and (update_fields is None or 'password' in update_fields)
+                   and self.password != getattr(self, '_loaded_password', None))
+
+        super().save(*args, **kwargs)
+        self._loaded_password = self.password
+
+        if changed:
+            password_changed.send(sender=self.__class__, instance=self)
+
+
+class UpperIExact(IExact):
+    """
+    email__iexact compiled as UPPER(email) = UPPER(%s) on every database, so it is answered from
+    the index of users_email_upper_uniq. Postgres compiles iexact this way already, SQLite would use LIKE, which
+    can't use the index.
+    """
+
+    def as_sql(self, compiler, connection):
+        rhs = self.rhs if hasattr(self.rhs, 'resolve_expression') else models.Value(self.rhs)
+        return compiler.compile(Exact(Upper(self.lhs), Upper(rhs)))
+
+
+UserAccount._meta.get_field('email').register_lookup(UpperIExact)
+
 
 @receiver(reset_password_token_created)
 def password_reset_token_created(sender, instance, reset_password_token, *args, **kwargs):
@@ -115,42 +216,44 @@ def password_reset_token_created(sender, instance, reset_password_token, *args,
             reset_password_token.key)
     }
 
-    # render email text
-    email_html_message = render_to_string('Users/email/user_reset_password.html', context)
+    # render email text and html from the precompiled template
+    email_plaintext_message, email_html_message = render_email(RESET_PASSWORD_TEMPLATE, context)
 
     msg = EmailMultiAlternatives(
         # title:
         "Password Reset Request for {title}".format(title="Couples Tools"),
         # message:
-        '',
+        email_plaintext_message,
         # from:
-        "noreply@somehost.local",
+        settings.DEFAULT_FROM_EMAIL,
         # to:
         [reset_password_token.user.email]
     )
     msg.attach_alternative(email_html_message, "text/html")
-    msg.send()
+    # Sent by the mail queue so the request doesn't wait for the mail server
+    get_mail_queue().enqueue(msg)
 
 
-@receiver(signals.pre_save, sender=UserAccount)
-def revoke_tokens(sender, instance, update_fields, **kwargs):
+@receiver(password_changed, sender=UserAccount)
+def revoke_tokens(sender, instance, **kwargs):
     """
-    Deletes the given user's refresh token on password change.
+    Blacklists all of the given user's outstanding refresh tokens on password change.
+
+    Revocation runs as a fixed number of statements no matter how many tokens the user
+    has: one SELECT for the tokens and one bulk INSERT into the blacklist. The blacklist
+    cache is updated too, so refreshing with a revoked token is rejected without a query.
 
-    @param sender: django.db.models
-    @param instance: UserAccount
+    @param sender: UserAccount class
+    @param instance: UserAccount whose password was changed
     """
-    # instance._state.adding gives true if object is being created for the first time
-    if not instance._state.adding:
-        existing_user = UserAccount.objects.get(pk=instance.pk)
-        # If instance.password is not the same as user's current password
-        if instance.password != existing_user.password:
-            # Get all the user tokens
-            outstanding_tokens = OutstandingToken.objects.filter(user__pk=instance.pk)
-
-            for out_token in outstanding_tokens:
-                if hasattr(out_token, 'blacklistedtoken'):
-                    # Token already blacklisted. Skip
-                    continue
-
-                BlacklistedToken.objects.create(token=out_token)
+    # The user's tokens which are not blacklisted yet
+    tokens = list(OutstandingToken.objects
+                  .filter(user_id=instance.pk, blacklistedtoken__isnull=True)
+                  .order_by()
+                  .values_list('pk', 'jti', 'expires_at'))
+    # ignore_conflicts covers tokens blacklisted concurrently, e.g. by a logout in another request
+    BlacklistedToken.objects.bulk_create([BlacklistedToken(token_id=token_id) for token_id, _, _ in tokens],
+                                         ignore_conflicts=True)
+    # Only cache the revocation once it is committed
+    transaction.on_commit(
+        lambda: blacklist_cache.set_many((jti, expires_at.timestamp()) for _, jti, expires_at in tokens))
@@ -1,9 +1,16 @@
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.utils.field_mapping import get_unique_error_message
+from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
 
 from .models import UserAccount
+from .tokens import RefreshToken
 
 
 ###############
@@ -19,6 +26,12 @@ class UserAccountSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserAccount
         fields = ['username', 'email', 'first_name', 'last_name', 'password']
+        extra_kwargs = {
+            # Emails are unique regardless of case, see users_email_upper_uniq
+            'email': {'validators': [UniqueValidator(UserAccount.objects.all(), lookup='iexact',
+                                                     message=get_unique_error_message(
+                                                         UserAccount._meta.get_field('email')))]},
+        }
 
     def create(self, validated_data):
         """
@@ -34,17 +47,96 @@ class UserAccountSerializer(serializers.ModelSerializer):
         if 'last_name' not in validated_data:
             raise serializers.ValidationError("Last Name is required")
 
-        user = UserAccount.objects.create(username=validated_data['username'],
-                                          email=validated_data['email'],
-                                          first_name=validated_data['first_name'],
-                                          last_name=validated_data['last_name'])
-        user.set_password(validated_data['password'])
-        # Save the user object
-        user.save()
+        # create_user hashes the password before saving, so the user is created with a single INSERT
+        with transaction.atomic():
+            user = UserAccount.objects.create_user(username=validated_data['username'],
+                                                   email=validated_data['email'],
+                                                   password=validated_data['password'],
+                                                   first_name=validated_data['first_name'],
+                                                   last_name=validated_data['last_name'])
         # Return the newly created user
         return user
 
 
+#########
+# Login #
+#########
+
+def set_user_claims(token, user):
+    """
+    Copies the user fields Users.authentication.StatelessJWTAuthentication reads into the token.
+    Access tokens copy them from the refresh token.
+    :param token: Refresh token
+    :param user: User object
+    """
+    token['username'] = user.username
+    token['is_active'] = user.is_active
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """
+    Issues the login token pair with the user claims Users.authentication.StatelessJWTAuthentication
+    needs, so authenticated requests don't have to load the user from the database.
+    """
+    token_class = RefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        set_user_claims(token, user)
+
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """
+    Refreshes the token pair, checking and updating the blacklist through its cache.
+
+    The user claims are read again from the database, so a deactivated user can't refresh and
+    changes to the account reach the new tokens instead of being carried over from the login.
+    """
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user = (UserAccount.objects
+                .filter(**{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]})
+                .only('username', 'is_active', 'is_staff', 'is_superuser')
+                .first())
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            error_messages = jwt_serializers.TokenObtainSerializer.default_error_messages
+            raise AuthenticationFailed(error_messages['no_active_account'], 'no_active_account')
+        set_user_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+##########
+# Logout #
+##########
+
+class TokenBlacklistSerializer(jwt_serializers.TokenBlacklistSerializer):
+    """
+    Blacklists the refresh token on logout, updating the blacklist cache as well.
+    """
+    token_class = RefreshToken
+
+
 ###################
 # Change Password #
 ###################
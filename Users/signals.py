@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after a UserAccount is saved with a new password set through set_password().
+# Provides the saved user as the `instance` argument.
+password_changed = Signal()
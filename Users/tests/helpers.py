@@ -1,21 +1,149 @@
+from contextlib import ContextDecorator
 from unittest.mock import patch
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django_rest_passwordreset.models import ResetPasswordToken
+from rest_framework import test
+
+from Users.serializers import TokenObtainPairSerializer
 
 
 __all__ = [
+    "APITestCase",
     "HelperMixin",
+    "query_budget",
     "patch"
 ]
 
 from Users.models import UserAccount
 
 
+class query_budget(ContextDecorator):
+    """
+    Fails with the executed SQL listed when the wrapped block, or decorated function, runs more
+    than `max_queries` queries. Savepoints are not counted, so a budget is the same whether the
+    test wraps the request in a transaction or not.
+
+        with query_budget(3):
+            self.client.post(...)
+
+    :param max_queries: Maximum number of queries
+    :param using: Alias of the database to count queries on
+    :param label: Name of the budgeted operation shown in the failure message
+    """
+
+    def __init__(self, max_queries, using=DEFAULT_DB_ALIAS, label=None):
+        self.max_queries = max_queries
+        self.using = using
+        self.label = label
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+
+        queries = [query['sql'] for query in self.context.captured_queries
+                   if 'SAVEPOINT' not in query['sql'].upper()]
+        if len(queries) > self.max_queries:
+            raise AssertionError('{} ran {} queries, the budget is {}:\n{}'.format(
+                self.label or 'Block', len(queries), self.max_queries,
+                '\n'.join('{}. {}'.format(i, sql) for i, sql in enumerate(queries, start=1))))
+        return False
+
+
+class APITestCase(test.APITestCase):
+    """
+    APITestCase which starts every test with an empty cache, so the throttle counters of earlier
+    tests don't reject its requests
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
 class HelperMixin:
     """
-    Mixin which encapsulates methods for login, logout, request reset password and reset password confirm
+    Mixin which encapsulates methods for login, logout, register, change password, request reset password
+    and reset password confirm, and factories for the users and tokens the tests need.
+
+    The factories are class methods so they can be called from setUpTestData(). The fixtures are then
+    created once per test class, every test gets its own copy of them and its changes to the database
+    are rolled back at the end of the test:
+
+        @classmethod
+        def setUpTestData(cls):
+            cls.user = cls.create_test_user()
+            cls.refresh = cls.create_refresh_token(cls.user)
     """
+    @classmethod
+    def create_test_user(cls, username='test', email=None, password='abc123', **other_fields):
+        """
+        Creates a user with create_user()
+        :param username: User's username
+        :param email: User's email, defaults to <username>@test.com
+        :param password: User's password
+        :param other_fields: Other user fields such as first_name or is_staff
+        :return: User object
+        """
+        return UserAccount.objects.create_user(username, email or '{}@test.com'.format(username), password,
+                                               **other_fields)
+
+    @classmethod
+    def create_test_users(cls, count, prefix='user', password='abc123', batch_size=1000, **other_fields):
+        """
+        Creates many users with bulk INSERTs, e.g. thousands of them for benchmark scenarios. They are
+        named <prefix>0, <prefix>1, ... with the email <prefix>0@test.com, ... and all share the same
+        password, which is hashed only once.
+        :param count: Number of users
+        :param prefix: Prefix of the usernames
+        :param password: Password of all the users
+        :param batch_size: Users inserted per query
+        :param other_fields: Other user fields such as first_name or is_staff
+        :return: List of User objects
+        """
+        encoded = make_password(password)
+        return UserAccount.objects.bulk_create(
+            [UserAccount(username='{}{}'.format(prefix, i), email='{}{}@test.com'.format(prefix, i),
+                         password=encoded, **other_fields) for i in range(count)],
+            batch_size=batch_size)
+
+    @classmethod
+    def create_refresh_token(cls, user):
+        """
+        Issues a refresh token for the user, like logging in does, with the same custom claims
+        :param user: User object
+        :return: Encoded refresh token
+        """
+        return str(TokenObtainPairSerializer.get_token(user))
+
+    @classmethod
+    def create_reset_token(cls, user, user_agent='', ip_address='127.0.0.1'):
+        """
+        Creates a password reset token for the user, without sending the reset mail
+        :param user: User object
+        :param user_agent: User agent the token was requested with
+        :param ip_address: IP address the token was requested from
+        :return: ResetPasswordToken object
+        """
+        return ResetPasswordToken.objects.create(user=user, user_agent=user_agent, ip_address=ip_address)
+
     def setUpUrls(self):
         """ set up urls by using djangos reverse function """
+        self.login_url = reverse('login')
+        self.logout_url = reverse('logout')
+        self.refresh_url = reverse('token_refresh')
+        self.signup_url = reverse('sign_up')
+        self.change_password_url = reverse('change_password')
         self.reset_password_request_url = reverse('password_reset:reset-password-request')
         self.reset_password_confirm_url = reverse('password_reset:reset-password-confirm')
         self.reset_password_validate_token_url = reverse('password_reset:reset-password-validate')
@@ -31,6 +159,55 @@ class HelperMixin:
 
         return user.check_password(password)
 
+    def assertMaxQueries(self, max_queries, label=None):
+        """
+        Context manager failing the test when the block runs more than max_queries queries
+        :param max_queries: Maximum number of queries
+        :param label: Name of the budgeted operation shown in the failure message
+        :return: query_budget instance
+        """
+        return query_budget(max_queries, label=label)
+
+    def rest_do_login(self, username, password):
+        """ REST API wrapper for logging in """
+        data = {
+            'username': username,
+            'password': password
+        }
+
+        return self.client.post(self.login_url, data, format='json')
+
+    def rest_do_refresh(self, refresh):
+        """ REST API wrapper for refreshing an access token """
+        return self.client.post(self.refresh_url, {'refresh': refresh}, format='json')
+
+    def rest_do_logout(self, refresh):
+        """ REST API wrapper for logging out, which blacklists the refresh token """
+        return self.client.post(self.logout_url, {'refresh': refresh}, format='json')
+
+    def rest_do_register(self, username, email, password, first_name='', last_name=''):
+        """ REST API wrapper for registering a user account """
+        data = {
+            'username': username,
+            'email': email,
+            'password': password,
+            'first_name': first_name,
+            'last_name': last_name
+        }
+
+        return self.client.post(self.signup_url, data, format='json')
+
+    def rest_do_change_password(self, access, old_password, new_password):
+        """ REST API wrapper for changing the password of the user the access token belongs to """
+        data = {
+            'old_password': old_password,
+            'password': new_password,
+            'password2': new_password
+        }
+
+        return self.client.put(self.change_password_url, data, format='json',
+                               HTTP_AUTHORIZATION='Bearer ' + access)
+
     def rest_do_request_reset_token(self, email, HTTP_USER_AGENT='', REMOTE_ADDR='127.0.0.1'):
         """ REST API wrapper for requesting a password reset token """
         data = {
@@ -0,0 +1,46 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from drf_boilerplate.middleware import (AuthenticationMiddleware, CsrfViewMiddleware, MessageMiddleware,
+                                        SessionMiddleware, XFrameOptionsMiddleware)
+
+
+@override_settings(API_PATH_PREFIXES=('/account/',))
+class APIPathExemptMiddlewareTestCase(SimpleTestCase):
+    """
+    Tests to make sure API requests skip the session, messages and CSRF middleware while the admin keeps them
+    """
+
+    def _handle(self, path):
+        """
+        Helper function which runs a request through the middleware
+        :return: (request as seen by the view, response)
+        """
+        seen = []
+
+        def view(request):
+            seen.append(request)
+            return HttpResponse()
+
+        handler = view
+        for middleware in (XFrameOptionsMiddleware, MessageMiddleware, AuthenticationMiddleware,
+                           CsrfViewMiddleware, SessionMiddleware):
+            handler = middleware(handler)
+        response = handler(RequestFactory().get(path))
+        return seen[0], response
+
+    def test_api_request_skips_middleware(self):
+        request, response = self._handle('/account/login/')
+
+        self.assertFalse(hasattr(request, 'session'))
+        self.assertFalse(hasattr(request, 'user'))
+        self.assertFalse(hasattr(request, '_messages'))
+        self.assertNotIn('X-Frame-Options', response)
+
+    def test_admin_request_runs_middleware(self):
+        request, response = self._handle('/admin/login/')
+
+        self.assertTrue(hasattr(request, 'session'))
+        self.assertTrue(hasattr(request, 'user'))
+        self.assertTrue(hasattr(request, '_messages'))
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
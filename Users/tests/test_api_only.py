@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from .helpers import APITestCase, HelperMixin
+
+
+@override_settings(ROOT_URLCONF='drf_boilerplate.urls_api')
+class APIURLConfTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure the URLconf of API-only workers serves the API without the admin
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.create_test_user()
+
+    def test_api_served(self):
+        response = self.client.post(reverse('login'), {'username': 'test', 'password': 'abc123'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_admin_not_served(self):
+        self.assertEqual(self.client.get('/admin/').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class APIOnlySettingsTestCase(APITestCase):
+    """
+    Tests to make sure the settings of API-only workers leave out the admin machinery
+    """
+
+    def test_api_only_settings(self):
+        """
+        Loads the project with api_only=True in a new process, since apps can't be unloaded
+        """
+        code = ('import django\n'
+                'django.setup()\n'
+                'from django.apps import apps\n'
+                'from django.conf import settings\n'
+                'from django.core.management import call_command\n'
+                'call_command("check")\n'
+                'print(apps.is_installed("django.contrib.admin"), apps.is_installed("django.contrib.sessions"),\n'
+                '      any("Session" in middleware for middleware in settings.MIDDLEWARE), settings.ROOT_URLCONF)\n')
+        env = dict(os.environ, api_only='True')
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True,
+                                cwd=settings.PROJECT_ROOT)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.split(), ['False', 'False', 'False', 'drf_boilerplate.urls_api'])
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from Users.hashing import HashingPool, HashingPoolBusy
+from Users.models import UserAccount
+from Users.views import AsyncChangePasswordView, AsyncLoginView, AsyncRegisterUser
+from .helpers import APITestCase, HelperMixin
+
+
+# Run the hashing inline so it shares the test's database connection
+@override_settings(HASHING_POOL={'MAX_WORKERS': 0})
+class AsyncViewsTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure the async login, register and change password views work like the sync ones
+    """
+    factory = APIRequestFactory()
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.create_test_user()
+
+    def _call(self, view_class, method, data, **extra):
+        """
+        Helper function which runs the async view for a request with the given data
+        :return: Rendered response
+        """
+        request = getattr(self.factory, method)('/', data, format='json', **extra)
+        response = async_to_sync(view_class.as_view())(request)
+        return response.render()
+
+    def _login(self, password='abc123'):
+        return self._call(AsyncLoginView, 'post', {'username': 'test', 'password': password})
+
+    def test_login(self):
+        """
+        Login with correct and wrong passwords
+        """
+        response = self._login()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+        self.assertIn('refresh', response.data)
+
+        self.assertEqual(self._login('abc1234').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_register(self):
+        """
+        Register a new user, then fail to register it again
+        """
+        data = {'username': 'tests',
+                'password': 'abc123',
+                'email': 'tests@tests.com',
+                'first_name': 'tests',
+                'last_name': 'tests'}
+        response = self._call(AsyncRegisterUser, 'post', data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(UserAccount.objects.get(username='tests').check_password('abc123'))
+
+        response = self._call(AsyncRegisterUser, 'post', data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_change_password(self):
+        """
+        Change the password of the logged-in user
+        """
+        access = self._login().data['access']
+        data = {'old_password': 'abc123',
+                'password': 'abc12343245',
+                'password2': 'abc12343245'}
+        response = self._call(AsyncChangePasswordView, 'put', data, HTTP_AUTHORIZATION='Bearer ' + access)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(UserAccount.objects.get().check_password('abc12343245'))
+
+
+class HashingPoolTestCase(SimpleTestCase):
+    """
+    Tests to make sure the hashing pool runs calls in its threads and rejects calls when full
+    """
+
+    def test_runs_in_pool_thread(self):
+        """
+        Calls run in one of the pool's threads and return their result
+        """
+        pool = HashingPool(max_workers=1, max_queue=0)
+        thread_name = asyncio.run(pool.run(lambda: threading.current_thread().name))
+        self.assertTrue(thread_name.startswith('hashing'))
+
+    def test_rejects_when_full(self):
+        """
+        Calls beyond the workers and queue fail straight away
+        """
+        pool = HashingPool(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def scenario():
+            blocked = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+            # Let both calls take their place in the pool
+            await asyncio.sleep(0.05)
+            self.assertEqual(pool.pending, 2)
+            with self.assertRaises(HashingPoolBusy):
+                await pool.run(release.wait)
+            release.set()
+            await asyncio.gather(*blocked)
+
+        asyncio.run(scenario())
+        self.assertEqual(pool.pending, 0)
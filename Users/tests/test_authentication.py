@@ -0,0 +1,87 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from Users.authentication import StatelessJWTAuthentication, TokenUser
+from Users.models import UserAccount
+from .helpers import APITestCase, HelperMixin
+
+
+class StatelessAuthenticationTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure access tokens authenticate requests without loading the user from the DB
+    """
+    login_url = reverse('login')
+    refresh_url = reverse('token_refresh')
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.create_test_user(is_staff=True)
+
+    def _authenticate(self, access_token):
+        """
+        Helper function which authenticates a request carrying the given access token
+        :param access_token: Encoded access token
+        :return: (user, token) tuple
+        """
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION='Bearer ' + str(access_token))
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_user_built_from_token_claims(self):
+        """
+        Login tokens carry the user claims and authenticating with them runs no queries
+        """
+        body = self.client.post(self.login_url, {'username': 'test', 'password': 'abc123'}).json()
+
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate(body['access'])
+
+        self.assertIsInstance(user, TokenUser)
+        self.assertEqual(user.username, 'test')
+        self.assertTrue(user.is_active)
+        self.assertTrue(user.is_staff)
+        self.assertFalse(user.is_superuser)
+
+    def test_inactive_claim_rejected(self):
+        """
+        Tokens issued for an inactive user don't authenticate
+        """
+        token = AccessToken.for_user(UserAccount.objects.get())
+        token['is_active'] = False
+
+        self.assertRaises(AuthenticationFailed, self._authenticate, token)
+
+    def test_refresh_reads_claims_from_db(self):
+        """
+        Claims of refreshed tokens come from the account's current state, not from the login
+        """
+        body = self.client.post(self.login_url, {'username': 'test', 'password': 'abc123'}).json()
+        UserAccount.objects.update(is_staff=False, is_superuser=True)
+
+        response = self.client.post(self.refresh_url, {'refresh': body['refresh']})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user, _ = self._authenticate(response.json()['access'])
+        self.assertFalse(user.is_staff)
+        self.assertTrue(user.is_superuser)
+        self.assertFalse(RefreshToken(response.json()['refresh'])['is_staff'])
+
+    def test_deactivated_user_cannot_refresh(self):
+        body = self.client.post(self.login_url, {'username': 'test', 'password': 'abc123'}).json()
+        UserAccount.objects.update(is_active=False)
+
+        response = self.client.post(self.refresh_url, {'refresh': body['refresh']})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn('access', response.json())
+
+    def test_deleted_user_cannot_refresh(self):
+        body = self.client.post(self.login_url, {'username': 'test', 'password': 'abc123'}).json()
+        UserAccount.objects.all().delete()
+
+        response = self.client.post(self.refresh_url, {'refresh': body['refresh']})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,52 @@
+from django.test import SimpleTestCase, TestCase
+
+from Users.benchmark import QueryCountingApp, percentile
+from Users.models import UserAccount
+
+
+class PercentileTestCase(SimpleTestCase):
+    """
+    Tests for the nearest-rank percentiles reported by the endpoint benchmark
+    """
+
+    def test_percentiles(self):
+        """
+        Percentiles pick an actual sample
+        """
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+
+    def test_few_samples(self):
+        """
+        High percentiles of a few samples are the slowest one
+        """
+        self.assertEqual(percentile([3, 1, 2], 99), 3)
+        self.assertEqual(percentile([5], 50), 5)
+        self.assertIsNone(percentile([], 50))
+
+
+class QueryCountingAppTestCase(TestCase):
+    """
+    Tests to make sure the benchmark server counts the queries of every request
+    """
+
+    def test_queries_counted_by_path(self):
+        """
+        Queries run by the wrapped application are recorded under the request path
+        """
+        def application(environ, start_response):
+            UserAccount.objects.count()
+            UserAccount.objects.exists()
+            return [b'']
+
+        app = QueryCountingApp(application)
+        app({'PATH_INFO': '/account/login/'}, None)
+        app({'PATH_INFO': '/account/login/'}, None)
+
+        self.assertEqual(app.take('/account/login/'), [2, 2])
+        # Counts are handed out only once
+        self.assertEqual(app.take('/account/login/'), [])
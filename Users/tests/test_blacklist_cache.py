@@ -0,0 +1,108 @@
+from unittest.mock import Mock, PropertyMock
+
+from django.db.models import QuerySet
+from django.urls import reverse
+from rest_framework import status
+
+from Users.blacklist import BlacklistCache, blacklist_cache
+from Users.tokens import RefreshToken
+from .helpers import APITestCase, HelperMixin, patch
+
+
+class BlacklistCacheTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure blacklisted refresh tokens are rejected from the cache without querying the DB
+    """
+    login_url = reverse('login')
+    logout_url = reverse('logout')
+    refresh_url = reverse('token_refresh')
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account and a refresh token of it in the DB, once for all the tests of the class
+        cls.user = cls.create_test_user()
+        cls.refresh = cls.create_refresh_token(cls.user)
+
+    def setUp(self):
+        super().setUp()
+        # The token is shared by the tests, forget an earlier test blacklisted it. The rollback
+        # only undoes it in the DB.
+        blacklist_cache.clear_local()
+
+    def _assert_rejected_without_queries(self):
+        """
+        Helper function which checks that refreshing with the token is rejected by the cache alone
+        """
+        with self.assertNumQueries(0):
+            response = self.client.post(self.refresh_url, {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_token_rejected_from_cache(self):
+        """
+        A refresh token used once is blacklisted and rejected on reuse without a blacklist query
+        """
+        response = self.client.post(self.refresh_url, {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self._assert_rejected_without_queries()
+
+    def test_logged_out_token_rejected_from_cache(self):
+        """
+        Logging out writes the token to the cache
+        """
+        response = self.client.post(self.logout_url, {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self._assert_rejected_without_queries()
+
+    def test_revoked_token_rejected_from_shared_cache(self):
+        """
+        revoke_tokens writes to the cache on commit, and other processes find it in the shared tier
+        """
+        self.user.set_password('abc12343245')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        # Simulate another process which only shares the Django cache
+        blacklist_cache.clear_local()
+
+        self._assert_rejected_without_queries()
+
+    def test_lookup_does_not_undo_concurrent_revocation(self):
+        """
+        A lookup which read "not blacklisted" from the DB before a revocation was cached doesn't
+        replace the cached revocation
+        """
+        exists = QuerySet.exists
+
+        def exists_then_revoke(queryset):
+            result = exists(queryset)
+            # The password is changed while the lookup is between the DB read and the cache write
+            patcher.stop()
+            self.user.set_password('abc12343245')
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.save()
+            return result
+
+        patcher = patch.object(QuerySet, 'exists', exists_then_revoke)
+        patcher.start()
+        # Verifying the token checks the blacklist
+        RefreshToken(self.refresh)
+        # Simulate another process which only shares the Django cache
+        blacklist_cache.clear_local()
+
+        self._assert_rejected_without_queries()
+
+    def test_cache_unavailable(self):
+        """
+        Logout and refresh work without the shared cache, the blacklist is read from the DB instead
+        """
+        broken_cache = Mock(**{name + '.side_effect': ConnectionError for name in ('get', 'set_many', 'add')})
+        with patch.object(BlacklistCache, 'cache', new_callable=PropertyMock, return_value=broken_cache):
+            response = self.client.post(self.logout_url, {'refresh': self.refresh})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            # Simulate another process, which didn't blacklist the token itself
+            blacklist_cache.clear_local()
+
+            response = self.client.post(self.refresh_url, {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(broken_cache.get.called)
@@ -0,0 +1,216 @@
+import io
+import json
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from Users.bulk import import_users, read_rows
+from Users.models import UserAccount
+from .helpers import APITestCase, HelperMixin, patch
+
+CSV = ('username,email,first_name,last_name,password\n'
+       'alice,alice@Example.com,Alice,Smith,pass-alice\n'
+       'bob,not-an-email,Bob,Smith,pass-bob\n'
+       'carol,carol@example.com,Carol,,pass-carol\n'
+       'existing,dave@example.com,Dave,Smith,pass-dave\n'
+       'alice,erin@example.com,Erin,Smith,pass-erin\n'
+       'frank,frank@example.com,Frank,Smith\n'
+       'grace,grace@example.com,Grace,Smith,pass-grace\n')
+
+
+class BulkImportTestCase(HelperMixin, APITestCase):
+    """
+    Tests to make sure bulk imports create the valid rows and report the others by line number
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_test_user('existing', 'existing@test.com')
+
+    def test_import_csv(self):
+        result = import_users(read_rows(io.StringIO(CSV), 'csv'))
+
+        self.assertEqual((result.rows, result.created, result.failed), (7, 3, 4))
+        self.assertEqual(result.error, None)
+        self.assertEqual({error['line']: sorted(error['errors']) for error in result.errors}, {
+            3: ['email'],
+            5: ['username'],
+            6: ['username'],
+            7: ['password'],
+        })
+        self.assertEqual(set(UserAccount.objects.values_list('username', flat=True)),
+                         {'existing', 'alice', 'carol', 'grace'})
+        # The domain of the email is normalized like create_user does
+        self.assertEqual(UserAccount.objects.get(username='alice').email, 'alice@example.com')
+        self.assertTrue(self.django_check_login('grace', 'pass-grace'))
+
+    def test_import_jsonl(self):
+        lines = [
+            json.dumps({'username': 'alice', 'email': 'alice@example.com', 'first_name': 'Alice',
+                        'last_name': 'Smith', 'password': 'pass-alice'}),
+            '',
+            '{"username": ',
+            json.dumps(['not', 'an', 'object']),
+            json.dumps({'username': 'bob', 'email': 'bob@example.com', 'password': 'pass-bob'}),
+        ]
+        result = import_users(read_rows(io.StringIO('\n'.join(lines)), 'jsonl'))
+
+        self.assertEqual((result.rows, result.created, result.failed), (4, 1, 3))
+        self.assertEqual([error['line'] for error in result.errors], [3, 4, 5])
+        self.assertEqual(sorted(result.errors[2]['errors']), ['first_name', 'last_name'])
+
+    def test_duplicates_across_batches(self):
+        rows = [(line, {'username': 'user', 'email': 'user{}@example.com'.format(line), 'first_name': 'A',
+                        'last_name': 'B', 'password': 'abc123'}) for line in range(1, 4)]
+        result = import_users(rows, batch_size=2)
+
+        self.assertEqual((result.created, result.failed), (1, 2))
+
+    def test_queries_per_batch(self):
+        """
+        A batch costs a query for the taken usernames, one for the taken emails and the INSERT
+        """
+        rows = [(line, {'username': 'user{}'.format(line), 'email': 'user{}@example.com'.format(line),
+                        'first_name': 'A', 'last_name': 'B', 'password': 'abc123'}) for line in range(1, 51)]
+        with self.assertMaxQueries(3, label='Importing a batch of 50 users'):
+            result = import_users(rows, batch_size=50)
+
+        self.assertEqual(result.created, 50)
+
+    def test_insert_conflict_falls_back_to_rows(self):
+        """
+        When the batch INSERT fails, e.g. because of a concurrent registration, rows are created one by one
+        """
+        with patch.object(UserAccount.objects, 'bulk_create', side_effect=IntegrityError):
+            result = import_users(read_rows(io.StringIO(CSV), 'csv'))
+
+        self.assertEqual((result.created, result.failed), (3, 4))
+        self.assertTrue(UserAccount.objects.filter(username='grace').exists())
+
+    def test_unreadable_file_stops_import(self):
+        stream = io.TextIOWrapper(io.BytesIO(b'{"username": "alice"}\n\xff\n'), encoding='utf-8')
+        result = import_users(read_rows(stream, 'jsonl'))
+
+        self.assertIn("can't decode", result.error)
+
+    def test_max_errors(self):
+        result = import_users(read_rows(io.StringIO(CSV), 'csv'), max_errors=1)
+
+        self.assertEqual(result.failed, 4)
+        self.assertEqual(len(result.errors), 1)
+
+    def test_max_rows(self):
+        result = import_users(read_rows(io.StringIO(CSV), 'csv'), max_rows=2)
+
+        self.assertEqual(result.rows, 2)
+        self.assertIn('more than 2 rows', result.error)
+
+    def test_import_command(self):
+        out = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.csv')
+            errors_path = os.path.join(directory, 'errors.jsonl')
+            with open(path, 'w') as f:
+                f.write(CSV)
+            call_command('import_users', path, errors=errors_path, stdout=out)
+            with open(errors_path) as f:
+                errors = [json.loads(line) for line in f]
+
+        self.assertEqual([error['line'] for error in errors], [3, 5, 6, 7])
+        self.assertIn('Created 3 of 7 users', out.getvalue())
+
+
+class BulkRegisterTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure only staff users can bulk register users from an uploaded file
+    """
+    login_url = reverse('login')
+    bulk_register_url = reverse('bulk_register')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_test_user('existing', 'existing@test.com')
+
+    def _upload(self, is_staff, content=CSV.encode(), name='users.csv', **data):
+        """
+        Helper function which logs in as a new user and uploads the file
+        :param is_staff: Whether the user is staff
+        :return: Response
+        """
+        self.create_test_user(is_staff=is_staff)
+        body = self.client.post(self.login_url, {'username': 'test', 'password': 'abc123'}).json()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + body['access'])
+        return self.client.post(self.bulk_register_url, dict(data, file=SimpleUploadedFile(name, content)),
+                                format='multipart')
+
+    def test_staff_can_bulk_register(self):
+        response = self._upload(is_staff=True)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.json()['created'], response.json()['failed']), (3, 4))
+        self.assertTrue(UserAccount.objects.filter(username='grace').exists())
+
+    def test_format_field(self):
+        content = json.dumps({'username': 'alice', 'email': 'alice@example.com', 'first_name': 'Alice',
+                              'last_name': 'Smith', 'password': 'pass-alice'}).encode()
+        response = self._upload(is_staff=True, content=content, name='users.txt', format='jsonl')
+
+        self.assertEqual(response.json()['created'], 1)
+
+    def test_unknown_format(self):
+        response = self._upload(is_staff=True, name='users.xlsx')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_cannot_bulk_register(self):
+        response = self._upload(is_staff=False)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(UserAccount.objects.filter(username='grace').exists())
+
+    def test_hashes_in_process(self):
+        with patch('Users.views.import_users', wraps=import_users) as mock_import:
+            self._upload(is_staff=True)
+
+        self.assertEqual(mock_import.call_args.kwargs['processes'], 1)
+        self.assertEqual(mock_import.call_args.kwargs['batch_size'], settings.BULK_IMPORT['UPLOAD_BATCH_SIZE'])
+
+    @override_settings(PASSWORD_HASHER_PARAMS={})
+    def test_upload_row_limit_fits_worker_timeout(self):
+        """
+        The passwords of the largest upload are hashed with the default cost of the preferred hasher
+        within half of the worker timeout, the other half is left for the rest of the request
+        """
+        hasher = get_hasher()
+        costs = []
+        for _ in range(3):
+            started = time.perf_counter()
+            hasher.encode('abc123', hasher.salt())
+            costs.append(time.perf_counter() - started)
+
+        self.assertLessEqual(settings.BULK_IMPORT['MAX_UPLOAD_ROWS'] * min(costs), settings.WORKER_TIMEOUT / 2)
+
+    @override_settings(BULK_IMPORT=dict(settings.BULK_IMPORT, MAX_UPLOAD_SIZE=10))
+    def test_upload_too_large(self):
+        response = self._upload(is_staff=True)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('file', response.json())
+        self.assertFalse(UserAccount.objects.filter(username='grace').exists())
+
+    @override_settings(BULK_IMPORT=dict(settings.BULK_IMPORT, MAX_UPLOAD_ROWS=2))
+    def test_upload_row_limit(self):
+        response = self._upload(is_staff=True)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['rows'], 2)
+        self.assertIn('more than 2 rows', response.json()['error'])
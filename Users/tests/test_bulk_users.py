@@ -0,0 +1,65 @@
+from django.test import TestCase
+
+from Users.hashing import get_hashing_processes, hash_passwords, hashing_process_pool
+from Users.models import UserAccount
+from .helpers import patch
+
+
+class BulkUsersTestCase(TestCase):
+    """
+    Tests to make sure users created in bulk get their own password hashes, in the given order
+    """
+
+    def test_make_users(self):
+        users = UserAccount.objects.make_users([
+            ('alice', 'alice@Example.com', 'pass-alice'),
+            ('bob', 'bob@example.com', 'pass-bob', {'first_name': 'Bob', 'is_staff': True}),
+        ], processes=1)
+
+        self.assertEqual([user.username for user in users], ['alice', 'bob'])
+        self.assertIsNone(users[0].pk)
+        self.assertEqual(users[0].email, 'alice@example.com')
+        self.assertEqual((users[1].first_name, users[1].is_staff), ('Bob', True))
+        self.assertTrue(users[0].check_password('pass-alice'))
+        self.assertTrue(users[1].check_password('pass-bob'))
+        self.assertFalse(UserAccount.objects.exists())
+
+    def test_create_users(self):
+        users = UserAccount.objects.create_users(
+            [('user{}'.format(i), 'user{}@example.com'.format(i), 'pass-{}'.format(i)) for i in range(5)],
+            processes=2)
+
+        self.assertEqual(UserAccount.objects.count(), 5)
+        for i, user in enumerate(users):
+            self.assertEqual(user.username, 'user{}'.format(i))
+            self.assertTrue(UserAccount.objects.get(pk=user.pk).check_password('pass-{}'.format(i)))
+
+    def test_missing_password(self):
+        with self.assertRaisesMessage(ValueError, 'Users must have a password'):
+            UserAccount.objects.make_users([('alice', 'alice@example.com', 'pass-alice'),
+                                            ('bob', 'bob@example.com', '')])
+
+    def test_hash_passwords_in_process_pool(self):
+        """
+        A pool can be reused over several calls, hashes come back in order
+        """
+        passwords = ['password-{}'.format(i) for i in range(5)]
+        with hashing_process_pool(2) as executor:
+            encoded = hash_passwords(passwords, 2, executor) + hash_passwords(passwords[:1], 2, executor)
+
+        user = UserAccount()
+        for password, hashed in zip(passwords + passwords[:1], encoded):
+            user.password = hashed
+            self.assertTrue(user.check_password(password))
+        self.assertNotEqual(encoded[0], encoded[-1])
+
+    def test_daemonic_process_hashes_itself(self):
+        """
+        Daemonic processes, e.g. workers of the parallel test runner, can't start a pool
+        """
+        with patch('multiprocessing.current_process') as current_process:
+            current_process.return_value.daemon = True
+            self.assertEqual(get_hashing_processes(4), 1)
+            with hashing_process_pool(4) as executor:
+                self.assertIsNone(executor)
+
@@ -1,22 +1,18 @@
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
 
-from Users.models import UserAccount
 from Users.serializers import ChangePasswordSerializer
+from .helpers import APITestCase, HelperMixin
 
 
-class ChangePasswordTestCase(APITestCase):
+class ChangePasswordTestCase(APITestCase, HelperMixin):
     login_url = reverse('login')
     change_pass_url = reverse('change_password')
 
-    def setUp(self):
-        # Set up a user account in the DB
-        self.user = UserAccount.objects.create_user(username='test',
-                                                    password='abc123',
-                                                    email='test@test.com',
-                                                    first_name='test',
-                                                    last_name='test')
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.user = cls.create_test_user(first_name='test', last_name='test')
 
     def _login(self):
         """
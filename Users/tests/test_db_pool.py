@@ -0,0 +1,40 @@
+from django.urls import reverse
+from rest_framework import status
+
+from Users.models import UserAccount
+from .helpers import APITestCase
+
+
+class DatabasePoolStatsTestCase(APITestCase):
+    """
+    Tests to make sure pool statistics are only shown to staff users
+    """
+    login_url = reverse('login')
+    pool_stats_url = reverse('db_pool_stats')
+
+    def _get_stats(self, is_staff):
+        """
+        Helper function which logs in as a new user and requests the pool statistics
+        :param is_staff: Whether the user is staff
+        :return: Response
+        """
+        UserAccount.objects.create_user(username='test', password='abc123', email='test@test.com',
+                                        is_staff=is_staff)
+        body = self.client.post(self.login_url, {'username': 'test', 'password': 'abc123'}).json()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + body['access'])
+        return self.client.get(self.pool_stats_url)
+
+    def test_staff_can_see_stats(self):
+        """
+        Staff users get the statistics of every pooled database
+        """
+        response = self._get_stats(is_staff=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('data', response.json())
+
+    def test_other_users_cannot_see_stats(self):
+        """
+        Other users are forbidden
+        """
+        response = self._get_stats(is_staff=False)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
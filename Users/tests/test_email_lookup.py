@@ -0,0 +1,86 @@
+import io
+from unittest import skipUnless
+
+from django.contrib.auth import authenticate
+from django.db import connection, IntegrityError
+from django.urls import reverse
+from django_rest_passwordreset.models import ResetPasswordToken
+from rest_framework import status
+
+from Users.bulk import import_users, read_rows
+from Users.models import UserAccount
+from Users.serializers import TokenObtainPairSerializer
+from .helpers import APITestCase, HelperMixin, patch
+
+
+class EmailLookupTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure emails are unique regardless of case, and case-insensitive email lookups use the
+    index of the users_email_upper_uniq constraint, for password reset and for logging in with the email
+    """
+    login_url = reverse('login')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_test_user(email='Test@test.com')
+
+    def setUp(self):
+        super().setUp()
+        self.setUpUrls()
+
+    def test_iexact_compiles_to_upper(self):
+        sql = str(UserAccount.objects.filter(email__iexact='TEST@TEST.COM').query)
+
+        self.assertIn('WHERE UPPER("Users_useraccount"."email") = (UPPER(TEST@TEST.COM))', sql)
+        self.assertEqual(UserAccount.objects.get(email__iexact='TEST@TEST.COM'), self.user)
+
+    @skipUnless(connection.vendor == 'sqlite', 'The plan of other databases depends on the table statistics')
+    def test_iexact_uses_index(self):
+        plan = UserAccount.objects.filter(email__iexact='test@test.com').explain()
+
+        self.assertIn('USING INDEX users_email_upper_uniq', plan)
+
+    def test_reset_request_ignores_case(self):
+        response = self.rest_do_request_reset_token('TEST@TEST.com')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(ResetPasswordToken.objects.get().user, self.user)
+
+    def test_login_with_email(self):
+        """
+        With LOGIN_WITH_EMAIL on, the login request has an email field matched case-insensitively
+        """
+        with patch.object(UserAccount, 'USERNAME_FIELD', 'email'), \
+                patch.object(TokenObtainPairSerializer, 'username_field', 'email'):
+            response = self.client.post(self.login_url, {'email': 'test@TEST.com', 'password': 'abc123'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.json())
+
+    def test_email_unique_regardless_of_case(self):
+        with self.assertRaises(IntegrityError):
+            self.create_test_user('other', 'test@TEST.com', 'other123')
+
+    def test_register_with_taken_email_in_other_case(self):
+        response = self.client.post(reverse('sign_up'), {'username': 'other', 'email': 'TEST@test.com',
+                                                          'password': 'abc123', 'first_name': 'Other',
+                                                          'last_name': 'User'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.json())
+
+    def test_import_with_taken_email_in_other_case(self):
+        csv = ('username,email,first_name,last_name,password\n'
+               'alice,TEST@test.com,Alice,Smith,pass-alice\n'
+               'bob,bob@example.com,Bob,Jones,pass-bob\n'
+               'carol,BOB@example.com,Carol,White,pass-carol\n')
+        result = import_users(read_rows(io.StringIO(csv), 'csv'), processes=1)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([(error['line'], list(error['errors'])) for error in result.errors],
+                         [(2, ['email']), (4, ['email'])])
+
+    def test_login_with_any_case_of_email(self):
+        with patch.object(UserAccount, 'USERNAME_FIELD', 'email'):
+            self.assertEqual(UserAccount.objects.get_by_natural_key('TEST@TEST.COM'), self.user)
+            self.assertEqual(authenticate(email='test@test.com', password='abc123'), self.user)
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from Users.models import UserAccount
+from .helpers import APITestCase, HelperMixin
+
+PBKDF2_HASHERS = ['Users.hashers.PBKDF2PasswordHasher', 'Users.hashers.ScryptPasswordHasher']
+SCRYPT_HASHERS = ['Users.hashers.ScryptPasswordHasher', 'Users.hashers.PBKDF2PasswordHasher']
+# Keep the costs low so the tests stay fast
+LOW_COST_PARAMS = {'pbkdf2_sha256': {'iterations': 1000}, 'scrypt': {'work_factor': 2 ** 4, 'parallelism': 1}}
+
+
+@override_settings(PASSWORD_HASHERS=PBKDF2_HASHERS, PASSWORD_HASHER_PARAMS=LOW_COST_PARAMS)
+class HasherProfileTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure hasher parameters come from the settings and passwords migrate on login
+    """
+    login_url = reverse('login')
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.user = cls.create_test_user()
+
+    def _login(self):
+        """
+        Helper function which logs in and returns the stored password hash afterwards
+        :return: Password hash
+        """
+        response = self.client.post(self.login_url, {'username': 'test', 'password': 'abc123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return UserAccount.objects.get().password
+
+    def test_params_from_settings(self):
+        """
+        New passwords are hashed with the configured cost
+        """
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_changed_cost_rehashes_on_login(self):
+        """
+        Raising the cost rehashes the password on the next login
+        """
+        with override_settings(PASSWORD_HASHER_PARAMS={'pbkdf2_sha256': {'iterations': 2000}}):
+            self.assertTrue(self._login().startswith('pbkdf2_sha256$2000$'))
+
+    @override_settings(PASSWORD_HASHERS=SCRYPT_HASHERS)
+    def test_changed_profile_rehashes_on_login(self):
+        """
+        Switching the preferred profile migrates old hashes on the next login
+        """
+        self.assertTrue(self._login().startswith('scrypt$16$'))
+
+    def test_benchmark_hashers(self):
+        """
+        The benchmark command reports hashes per second for each profile
+        """
+        out = StringIO()
+        call_command('benchmark_hashers', 'pbkdf2', 'scrypt', seconds=0.1, stdout=out)
+
+        self.assertIn('pbkdf2', out.getvalue())
+        self.assertIn('scrypt', out.getvalue())
+        self.assertIn('hashes/s per core', out.getvalue())
+
+
+class HasherImportTestCase(SimpleTestCase):
+    """
+    Tests to make sure loading the password hashers doesn't load the session and messages middleware
+    """
+
+    def test_hashers_import_no_middleware(self):
+        middleware = ['drf_boilerplate.middleware', 'django.contrib.auth.middleware',
+                      'django.contrib.messages.middleware', 'django.contrib.sessions.middleware',
+                      'django.middleware.csrf', 'django.middleware.clickjacking']
+        # Compared with the modules Django's hashers load themselves
+        code = ('import sys, django.contrib.auth.hashers; loaded = set(sys.modules); import Users.hashers; '
+                'print(" ".join(name for name in {!r} if name in set(sys.modules) - loaded))'.format(middleware))
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+
+        self.assertEqual(output.stdout.strip(), '')
@@ -0,0 +1,50 @@
+from django.test import TestCase
+from django_rest_passwordreset.models import ResetPasswordToken
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from Users.models import UserAccount
+from .helpers import HelperMixin
+
+
+class FixtureFactoriesTestCase(TestCase, HelperMixin):
+    """
+    Tests to make sure fixtures created once per class are restored for every test
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = cls.create_test_users(20)
+        cls.user = cls.create_test_user()
+        cls.refresh = cls.create_refresh_token(cls.user)
+        cls.reset_token = cls.create_reset_token(cls.user)
+
+    def test_create_test_users(self):
+        self.assertEqual(UserAccount.objects.count(), 21)
+        self.assertEqual((self.users[-1].username, self.users[-1].email), ('user19', 'user19@test.com'))
+        self.assertIsNotNone(self.users[-1].pk)
+        self.assertTrue(self.django_check_login('user19', 'abc123'))
+
+    def test_tokens(self):
+        refresh = RefreshToken(self.refresh)
+        # Recorded like at login, before the custom claims are added
+        self.assertEqual(OutstandingToken.objects.get().jti, refresh['jti'])
+        self.assertEqual(refresh['username'], self.user.username)
+        self.assertEqual(ResetPasswordToken.objects.get().user, self.user)
+
+    def test_changes_are_rolled_back_1(self):
+        self._change_fixtures()
+
+    def test_changes_are_rolled_back_2(self):
+        self._change_fixtures()
+
+    def _change_fixtures(self):
+        """
+        Helper function run by two tests, which finds the fixtures untouched by the other one and changes them
+        """
+        self.assertEqual(self.user.first_name, '')
+        self.assertTrue(ResetPasswordToken.objects.exists())
+        self.user.first_name = 'changed'
+        self.user.save()
+        ResetPasswordToken.objects.all().delete()
+        UserAccount.objects.filter(pk__in=[user.pk for user in self.users[:10]]).delete()
@@ -2,26 +2,24 @@ from functools import partial
 
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from Users.models import UserAccount
+from .helpers import APITestCase, HelperMixin
 
 
-class LoginTestCase(APITestCase):
+class LoginTestCase(APITestCase, HelperMixin):
     """
     Different tests to make sure login system works as intended
     """
 
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.create_test_user(first_name='test', last_name='test')
 
     def setUp(self):
-        # Set up a user account in the DB
-        UserAccount.objects.create_user(username='test',
-                                        password='abc123',
-                                        email='test@test.com',
-                                        first_name='test',
-                                        last_name='test')
+        super().setUp()
         self.login_url = reverse('login')
         self.logout_url = reverse('logout')
 
@@ -0,0 +1,177 @@
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import override_settings
+from rest_framework import status
+
+from Users.mail import (RESET_PASSWORD_TEMPLATE, LocMemMailQueue, ThreadedMailQueue, get_email_template,
+                        get_mail_queue, render_email)
+from .helpers import APITestCase, HelperMixin
+
+
+class FlakyEmailBackend(EmailBackend):
+    """
+    Email backend which fails the first time it is asked to send
+    """
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyEmailBackend.failures < 1:
+            FlakyEmailBackend.failures += 1
+            raise ConnectionError('Mail server unavailable')
+        return super().send_messages(messages)
+
+
+class RefusingEmailBackend(EmailBackend):
+    """
+    Email backend which always refuses messages to refused@mail.com, like a server rejecting a recipient
+    """
+
+    def send_messages(self, messages):
+        if any('refused@mail.com' in message.to for message in messages):
+            raise ConnectionError('Recipient refused')
+        return super().send_messages(messages)
+
+
+class UnreachableEmailBackend(EmailBackend):
+    """
+    Email backend which can't connect to the mail server
+    """
+
+    def open(self):
+        raise ConnectionError('Mail server unreachable')
+
+
+@override_settings(MAIL_QUEUE={'BACKEND': 'Users.mail.LocMemMailQueue'})
+class MailQueueTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure password reset emails are queued instead of being sent in the request
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_test_user('user1', 'user1@mail.com', 'secret1')
+
+    def setUp(self):
+        super().setUp()
+        self.setUpUrls()
+        FlakyEmailBackend.failures = 0
+
+    def test_reset_email_is_queued(self):
+        """
+        The reset request returns before the email is sent and the queue delivers it later
+        """
+        response = self.rest_do_request_reset_token(email='user1@mail.com')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        mail_queue = get_mail_queue()
+        self.assertIsInstance(mail_queue, LocMemMailQueue)
+        self.assertEqual(mail_queue.qsize(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+        mail_queue.flush()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user1@mail.com'])
+        # The plain text body is rendered along with the html alternative
+        self.assertIn('Dear user1', mail.outbox[0].body)
+        self.assertIn('/account/password_reset/validate_token?token=', mail.outbox[0].body)
+
+    @override_settings(DEFAULT_FROM_EMAIL='accounts@example.com')
+    def test_reset_email_sender(self):
+        self.rest_do_request_reset_token(email='user1@mail.com')
+        get_mail_queue().flush()
+
+        self.assertEqual(mail.outbox[0].from_email, 'accounts@example.com')
+
+    def test_failed_delivery_is_retried(self):
+        """
+        Messages are retried after a failure without resending the ones already delivered
+        """
+        mail_queue = LocMemMailQueue(backend='Users.tests.test_mail_queue.FlakyEmailBackend', backoff=0)
+        mail_queue.enqueue(EmailMessage('subject', 'body', to=['first@mail.com']))
+        mail_queue.enqueue(EmailMessage('subject', 'body', to=['second@mail.com']))
+
+        mail_queue.flush()
+
+        self.assertEqual([message.to for message in mail.outbox], [['first@mail.com'], ['second@mail.com']])
+
+    def test_refused_message_does_not_drop_the_others(self):
+        """
+        A message failing every retry is dropped alone, the ones queued behind it are still sent
+        """
+        mail_queue = LocMemMailQueue(backend='Users.tests.test_mail_queue.RefusingEmailBackend', backoff=0)
+        for to in ('first@mail.com', 'refused@mail.com', 'second@mail.com', 'third@mail.com'):
+            mail_queue.enqueue(EmailMessage('subject', 'body', to=[to]))
+
+        with self.assertLogs('Users.mail', 'ERROR') as logs:
+            sent = mail_queue.deliver(mail_queue.messages)
+
+        self.assertEqual(sent, 3)
+        self.assertEqual([message.to for message in mail.outbox],
+                         [['first@mail.com'], ['second@mail.com'], ['third@mail.com']])
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('refused@mail.com', logs.output[0])
+
+    def test_unreachable_server_drops_the_batch(self):
+        mail_queue = LocMemMailQueue(backend='Users.tests.test_mail_queue.UnreachableEmailBackend', backoff=0)
+        mail_queue.enqueue(EmailMessage('subject', 'body', to=['first@mail.com']))
+        mail_queue.enqueue(EmailMessage('subject', 'body', to=['second@mail.com']))
+
+        with self.assertLogs('Users.mail', 'ERROR') as logs:
+            mail_queue.flush()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertIn('Dropping 2 email(s)', logs.output[0])
+
+    def test_threaded_queue_delivers_in_background(self):
+        """
+        The threaded queue delivers messages from its worker thread
+        """
+        mail_queue = ThreadedMailQueue(backoff=0)
+        for i in range(3):
+            mail_queue.enqueue(EmailMessage('subject', 'body', to=['user{}@mail.com'.format(i)]))
+
+        mail_queue.flush(timeout=5)
+
+        self.assertEqual(mail_queue.qsize(), 0)
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class RenderEmailTestCase(APITestCase):
+    """
+    Tests to make sure email templates are compiled once and render both text and html
+    """
+
+    def test_template_compiled_once(self):
+        """
+        The template is compiled at startup and reused by every render
+        """
+        hits = get_email_template.cache_info().hits
+
+        for _ in range(3):
+            render_email(RESET_PASSWORD_TEMPLATE, {'username': 'user1', 'reset_password_url': 'http://host/reset'})
+
+        self.assertEqual(get_email_template.cache_info().hits, hits + 3)
+
+    def test_text_alternative_keeps_links(self):
+        """
+        The plain text version has no markup and keeps the reset link
+        """
+        text, html = render_email(RESET_PASSWORD_TEMPLATE,
+                                  {'username': 'user1', 'reset_password_url': 'http://host/reset'})
+
+        self.assertIn('<a href="http://host/reset"', html)
+        self.assertNotIn('<', text)
+        self.assertIn('Click here (http://host/reset)', text)
+
+    def test_text_alternative_unescapes_entities(self):
+        """
+        Characters escaped in the html are plain in the text version, so its reset link works
+        """
+        text, html = render_email(RESET_PASSWORD_TEMPLATE,
+                                  {'username': "O'Neil & co", 'reset_password_url': 'http://host/reset?token=a&b=c'})
+
+        self.assertIn('O&#x27;Neil &amp; co', html)
+        self.assertIn("Dear O'Neil & co", text)
+        self.assertIn('(http://host/reset?token=a&b=c)', text)
+        self.assertNotIn('&amp;', text)
@@ -0,0 +1,108 @@
+from django.test import override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from drf_boilerplate.metrics import token_count_collector
+from Users.throttling import record_throttle_result
+from .helpers import APITestCase, HelperMixin
+
+METRICS = {'TOKEN': '', 'ALLOW_ANONYMOUS': True, 'GAUGE_INTERVAL': 1, 'TOKEN_COUNT_INTERVAL': 60}
+
+
+@override_settings(METRICS=METRICS)
+class MetricsTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure request, token and throttle metrics are exposed at /metrics/
+    """
+    login_url = reverse('login')
+    metrics_url = reverse('metrics')
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.user = cls.create_test_user()
+
+    def setUp(self):
+        super().setUp()
+        # Token counts are reused between scrapes, forget the ones of other tests
+        token_count_collector._counts = None
+
+    def _sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def _scrape(self, **extra):
+        response = self.client.get(self.metrics_url, **extra)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content.decode()
+
+    def test_requests_counted_by_view(self):
+        """
+        Every login adds to the request counter and duration histogram of the login view
+        """
+        labels = {'view': 'login', 'method': 'POST'}
+        before = self._sample('http_requests_total', status='200', **labels)
+        before_duration = self._sample('http_request_duration_seconds_count', **labels)
+
+        for _ in range(2):
+            self.client.post(self.login_url, {'username': 'test', 'password': 'abc123'})
+
+        self.assertEqual(self._sample('http_requests_total', status='200', **labels), before + 2)
+        self.assertEqual(self._sample('http_request_duration_seconds_count', **labels), before_duration + 2)
+        self.assertIn('http_requests_total{method="POST",status="200",view="login"}', self._scrape())
+
+    def test_token_counts(self):
+        """
+        Token table sizes are exposed and reused until TOKEN_COUNT_INTERVAL has passed
+        """
+        RefreshToken.for_user(self.user)
+        RefreshToken.for_user(self.user).blacklist()
+
+        body = self._scrape()
+        self.assertIn('auth_tokens{table="outstanding"} 2.0', body)
+        self.assertIn('auth_tokens{table="blacklisted"} 1.0', body)
+
+        RefreshToken.for_user(self.user)
+        with self.assertNumQueries(0):
+            self.assertIn('auth_tokens{table="outstanding"} 2.0', self._scrape())
+
+        with override_settings(METRICS=dict(METRICS, TOKEN_COUNT_INTERVAL=0)):
+            self.assertIn('auth_tokens{table="outstanding"} 3.0', self._scrape())
+
+    def test_throttle_results(self):
+        """
+        Throttle decisions are mirrored as a counter
+        """
+        before = self._sample('auth_throttle_requests_total', scope='login_ip', result='rejected')
+
+        record_throttle_result('login_ip', False)
+
+        self.assertEqual(self._sample('auth_throttle_requests_total', scope='login_ip', result='rejected'),
+                         before + 1)
+
+    def test_process_gauges(self):
+        """
+        The mail queue and hashing pool gauges are exposed
+        """
+        body = self._scrape()
+
+        self.assertIn('mail_queue_depth ', body)
+        self.assertIn('hashing_pool_pending ', body)
+
+    @override_settings(METRICS=dict(METRICS, TOKEN='secret'))
+    def test_token_required(self):
+        """
+        Scrapes need the configured token
+        """
+        self.assertEqual(self.client.get(self.metrics_url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer wrong').status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self._scrape(HTTP_AUTHORIZATION='Bearer secret')
+
+    @override_settings(METRICS=dict(METRICS, ALLOW_ANONYMOUS=False))
+    def test_closed_without_token(self):
+        """
+        In production, the metrics are not served until a token is set
+        """
+        self.assertEqual(self.client.get(self.metrics_url).status_code, status.HTTP_403_FORBIDDEN)
@@ -4,13 +4,10 @@ from datetime import timedelta
 from django.test import override_settings
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
 
 from django_rest_passwordreset.models import ResetPasswordToken, get_password_reset_token_expiry_time
 from django_rest_passwordreset.views import clear_expired_tokens, generate_token_for_email
-from .helpers import HelperMixin, patch
-
-from Users.models import UserAccount
+from .helpers import APITestCase, HelperMixin, patch
 
 
 class TestPasswordReset(APITestCase, HelperMixin):
@@ -18,13 +15,18 @@ class TestPasswordReset(APITestCase, HelperMixin):
     Several Test Cases for the Multi Auth Token Django App
     """
 
+    @classmethod
+    def setUpTestData(cls):
+        # Created once for the class, the changes of every test are rolled back
+        cls.user1 = cls.create_test_user("user1", "user1@mail.com", "secret1")
+        cls.user2 = cls.create_test_user("user2", "user2@mail.com", "secret2")
+        cls.user3 = cls.create_test_user("user3@mail.com", "not-that-mail@mail.com", "secret3")
+        cls.user4 = cls.create_test_user("user4", "user4@mail.com", "secret4")
+        cls.user5 = cls.create_test_user("user5", "uѕer5@mail.com", "secret5")  # email contains kyrillic s
+
     def setUp(self):
+        super().setUp()
         self.setUpUrls()
-        self.user1 = UserAccount.objects.create_user("user1", "user1@mail.com", "secret1")
-        self.user2 = UserAccount.objects.create_user("user2", "user2@mail.com", "secret2")
-        self.user3 = UserAccount.objects.create_user("user3@mail.com", "not-that-mail@mail.com", "secret3")
-        self.user4 = UserAccount.objects.create_user("user4", "user4@mail.com", "secret4")
-        self.user5 = UserAccount.objects.create_user("user5", "uѕer5@mail.com", "secret5")  # email contains kyrillic s
 
     def test_try_reset_password_email_does_not_exist(self):
         """ Tests requesting a token for an email that does not exist """
@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from Users.management.commands.profile_startup import PHASES, aggregate_import_times
+
+
+class ProfileStartupTestCase(SimpleTestCase):
+    """
+    Tests to make sure the startup profile measures a worker started in a new process
+    """
+
+    def test_aggregate_import_times(self):
+        lines = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |     rest_framework.compat',
+            'import time:      1500 |       1620 |   rest_framework',
+            'import time:       380 |        380 | orjson',
+            'some other output',
+        ]
+
+        self.assertEqual(aggregate_import_times(lines), {
+            'rest_framework': {'modules': 2, 'ms': 1.62},
+            'orjson': {'modules': 1, 'ms': 0.38},
+        })
+
+    def test_profile_startup(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'startup.json')
+            call_command('profile_startup', runs=1, target=60000, output=output, stdout=out)
+            with open(output) as f:
+                report = json.load(f)
+
+        self.assertEqual(set(report['phases_ms']), set(PHASES))
+        self.assertGreater(report['time_to_first_request_ms'], 0)
+        self.assertIn('django', report['packages'])
+        self.assertIn('Time to first request', out.getvalue())
+
+    def test_over_target(self):
+        with self.assertRaisesMessage(CommandError, 'over the target'):
+            call_command('profile_startup', runs=1, target=0, stdout=StringIO())
@@ -0,0 +1,51 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from Users.maintenance import prune_expired_tokens
+from .helpers import HelperMixin
+
+
+class PruneTokensTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure expired tokens are pruned and live ones are kept
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB
+        cls.user = cls.create_test_user()
+        now = timezone.now()
+        # Interleave expired and live tokens, half of each blacklisted
+        for i in range(10):
+            expires_at = now - timedelta(hours=1) if i % 2 else now + timedelta(hours=1)
+            token = OutstandingToken.objects.create(user=cls.user, jti='jti-{}'.format(i),
+                                                    token='token', expires_at=expires_at)
+            if i < 5:
+                BlacklistedToken.objects.create(token=token)
+
+    def test_prune_expired_tokens(self):
+        """
+        Only expired tokens and their blacklist entries are deleted, across several batches
+        """
+        result = prune_expired_tokens(batch_size=2)
+
+        self.assertEqual(result.outstanding, 5)
+        self.assertEqual(result.blacklisted, 2)
+        self.assertFalse(OutstandingToken.objects.filter(expires_at__lt=timezone.now()).exists())
+        self.assertEqual(OutstandingToken.objects.count(), 5)
+        self.assertEqual(BlacklistedToken.objects.count(), 3)
+
+    def test_prune_tokens_command(self):
+        """
+        The management command reports the deleted rows and throughput
+        """
+        out = StringIO()
+        call_command('prune_tokens', batch_size=3, stdout=out)
+
+        self.assertIn('Deleted 5 outstanding and 2 blacklisted tokens', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
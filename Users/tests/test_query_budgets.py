@@ -0,0 +1,137 @@
+from django.db import transaction
+from rest_framework import status
+
+from .helpers import APITestCase, HelperMixin, query_budget
+
+from Users.blacklist import blacklist_cache
+from Users.models import UserAccount
+
+
+class QueryBudgetTestCase(APITestCase, HelperMixin):
+    """
+    Pins the maximum number of queries of every auth endpoint, so extra database round trips
+    fail the build with the executed SQL listed. Lower a budget when an endpoint gets cheaper.
+    """
+    REGISTER = 3         # username and email uniqueness checks, INSERT
+    LOGIN = 3            # user SELECT, outstanding token INSERT, last_login UPDATE
+    REFRESH = 5          # blacklist check, user SELECT, blacklisting the rotated token
+    LOGOUT = 5           # blacklist check, outstanding token get_or_create, blacklisted token get_or_create
+    CHANGE_PASSWORD = 4  # user SELECT, UPDATE, outstanding tokens SELECT, blacklist bulk INSERT
+    RESET_REQUEST = 4    # expired tokens DELETE, user SELECT, token COUNT, token INSERT
+    RESET_VALIDATE = 1   # token SELECT
+    RESET_CONFIRM = 7    # token SELECTs, user SELECT and UPDATE, token revocation, reset tokens DELETE
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_test_user('test', 'test@test.com', 'Old-password-1')
+
+    def setUp(self):
+        super().setUp()
+        # Blacklist lookups answered from memory would hide their queries
+        blacklist_cache.clear_local()
+        self.setUpUrls()
+
+    def _login(self):
+        """
+        Helper function which logs in the user outside of any budget
+        :return: Response body with the access and refresh tokens
+        """
+        return self.rest_do_login('test', 'Old-password-1').json()
+
+    def _issue_tokens(self, count):
+        """
+        Helper function which issues refresh tokens for the user, like logins from other devices would
+        :param count: Number of tokens to issue
+        """
+        for _ in range(count):
+            self.create_refresh_token(self.user)
+
+    def test_register(self):
+        with self.assertMaxQueries(self.REGISTER, label='register'):
+            response = self.rest_do_register('new', 'new@test.com', 'New-password-1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_login(self):
+        with self.assertMaxQueries(self.LOGIN, label='login'):
+            response = self.rest_do_login('test', 'Old-password-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_refresh(self):
+        refresh = self._login()['refresh']
+
+        with self.assertMaxQueries(self.REFRESH, label='refresh'):
+            response = self.rest_do_refresh(refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_logout(self):
+        refresh = self._login()['refresh']
+
+        with self.assertMaxQueries(self.LOGOUT, label='logout'):
+            response = self.rest_do_logout(refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_change_password(self):
+        """
+        The budget holds no matter how many refresh tokens the password change revokes
+        """
+        access = self._login()['access']
+        self._issue_tokens(20)
+
+        with self.assertMaxQueries(self.CHANGE_PASSWORD, label='change_password'):
+            response = self.rest_do_change_password(access, 'Old-password-1', 'New-password-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_reset_request(self):
+        with self.assertMaxQueries(self.RESET_REQUEST, label='password reset request'):
+            response = self.rest_do_request_reset_token('test@test.com')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_reset_validate(self):
+        token = self.create_reset_token(self.user)
+
+        with self.assertMaxQueries(self.RESET_VALIDATE, label='password reset validate'):
+            response = self.rest_do_validate_token(token.key)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_reset_confirm(self):
+        """
+        The budget holds no matter how many refresh tokens the password reset revokes
+        """
+        token = self.create_reset_token(self.user)
+        self._issue_tokens(20)
+
+        with self.assertMaxQueries(self.RESET_CONFIRM, label='password reset confirm'):
+            response = self.rest_do_reset_password_with_token(token.key, 'New-password-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class QueryBudgetHelperTestCase(APITestCase):
+    """
+    Tests for the query_budget helper itself
+    """
+
+    def test_over_budget_lists_queries(self):
+        """
+        Exceeding the budget fails with every executed statement in the message
+        """
+        with self.assertRaises(AssertionError) as cm:
+            with query_budget(1, label='lookups'):
+                UserAccount.objects.filter(username='a').exists()
+                UserAccount.objects.filter(username='b').exists()
+
+        message = str(cm.exception)
+        self.assertIn('lookups ran 2 queries, the budget is 1', message)
+        self.assertIn("= 'a'", message)
+        self.assertIn("= 'b'", message)
+
+    def test_decorator(self):
+        """
+        The budget can decorate a function and savepoints don't count against it
+        """
+        @query_budget(1)
+        def create():
+            # A savepoint, since the test already runs in a transaction
+            with transaction.atomic():
+                return UserAccount.objects.create(username='a', email='a@test.com')
+
+        self.assertEqual(create().username, 'a')
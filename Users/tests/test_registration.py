@@ -1,8 +1,10 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
 
 from Users.models import UserAccount
+from .helpers import APITestCase
 
 
 class RegisterUserTestCase(APITestCase):
@@ -142,3 +144,22 @@ class RegisterUserTestCase(APITestCase):
         response = self.client.post(self.signup_url, data, format='json')
         # Request is failed due to duplicate email address
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_account_single_write(self):
+        """
+        The user is inserted with its hashed password in a single write
+        """
+        data = {'username': 'tests',
+                'password': 'abc123',
+                'email': 'tests@tests.com',
+                'first_name': 'tests',
+                'last_name': 'tests'}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.signup_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Uniqueness checks are reads, the only write is the INSERT
+        writes = [query['sql'] for query in queries if not query['sql'].startswith(('SELECT', 'SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].startswith('INSERT'))
+        self.assertTrue(UserAccount.objects.get().check_password('abc123'))
@@ -0,0 +1,88 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from drf_boilerplate import renderers
+from drf_boilerplate.renderers import FastJSONParser, FastJSONRenderer
+from .helpers import APITestCase, HelperMixin
+
+
+class FastJSONTestCase(SimpleTestCase):
+    """
+    Tests to make sure the orjson renderer and parser produce the same results as DRF's
+    """
+    data = {
+        'username': ErrorDetail('A user with that username already exists.', code='unique'),
+        'detail': gettext_lazy('Not found.'),
+        'created': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'day': datetime.date(2024, 5, 1),
+        'amount': Decimal('1.50'),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'name': 'Zoë \u2028 line',
+        1: [True, None, 1.5, ('a', 'b')],
+    }
+
+    @skipIf(renderers.orjson is None, 'orjson is not installed')
+    def test_render_like_drf(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_render_without_orjson(self):
+        with patch('drf_boilerplate.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_render_indent(self):
+        """
+        Indented output is still available
+        """
+        rendered = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_parse_like_drf(self):
+        body = '{"username": "Zoë", "numbers": [1, 2.5], "nested": {"ok": true}}'.encode()
+
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+
+    def test_parse_errors(self):
+        """
+        Invalid JSON, including NaN, is a parse error
+        """
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(body))
+
+
+class JSONOnlyResponsesTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure the account endpoints answer in JSON whatever the client accepts
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.create_test_user()
+
+    def test_invalid_json(self):
+        response = self.client.post(reverse('login'), b'{"username": ', content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+    def test_form_data_rejected(self):
+        """
+        Only JSON request bodies are parsed
+        """
+        response = self.client.post(reverse('login'), {'username': 'test', 'password': 'abc123'}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
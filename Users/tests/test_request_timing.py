@@ -0,0 +1,116 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+from django.test.client import RequestFactory
+from django.urls import reverse
+from rest_framework import status
+
+from drf_boilerplate.middleware import RequestTimingMiddleware
+from drf_boilerplate.timing import RequestTimings, _current_timings, timing
+from Users.hashing import HashingPool
+from .helpers import APITestCase, HelperMixin
+
+
+class RequestTimingMiddlewareTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure sampled requests are timed, logged and get a Server-Timing header
+    """
+    login_url = reverse('login')
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.create_test_user()
+
+    def _login(self):
+        return self.client.post(self.login_url, {'username': 'test', 'password': 'abc123'})
+
+    @override_settings(REQUEST_TIMING={'SAMPLE_RATE': 1.0, 'SERVER_TIMING_HEADER': True})
+    def test_timed_request(self):
+        """
+        Login is logged with its queries and hashing time, and gets a Server-Timing header
+        """
+        with self.assertLogs('drf_boilerplate.timing', 'INFO') as logs:
+            response = self._login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'login')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['method'], 'POST')
+        # User SELECT, outstanding token INSERT and last_login UPDATE, plus the test's savepoints
+        self.assertGreaterEqual(record['queries'], 3)
+        self.assertGreater(record['hashing_ms'], 0)
+        self.assertGreaterEqual(record['total_ms'], record['db_ms'] + record['hashing_ms'])
+
+        self.assertIn('hashing;dur=', response['Server-Timing'])
+        self.assertIn('db;dur={};desc="{} queries"'.format(record['db_ms'], record['queries']),
+                      response['Server-Timing'])
+
+    @override_settings(REQUEST_TIMING={'SAMPLE_RATE': 1.0, 'SERVER_TIMING_HEADER': False})
+    def test_header_disabled(self):
+        """
+        Timed requests are logged without a header when it is turned off
+        """
+        with self.assertLogs('drf_boilerplate.timing', 'INFO'):
+            response = self._login()
+
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_TIMING={'SAMPLE_RATE': 0, 'SERVER_TIMING_HEADER': True})
+    def test_not_sampled(self):
+        """
+        Requests left out of the sample are neither timed nor logged
+        """
+        with self.assertNoLogs('drf_boilerplate.timing', 'INFO'):
+            response = self._login()
+
+        self.assertNotIn('Server-Timing', response)
+
+
+@override_settings(REQUEST_TIMING={'SAMPLE_RATE': 1.0, 'SERVER_TIMING_HEADER': True})
+class AsyncRequestTimingTestCase(SimpleTestCase):
+    """
+    Tests to make sure work done in other threads counts towards the request's timings
+    """
+
+    def test_hashing_pool_thread(self):
+        """
+        Hashing in the hashing pool's threads is recorded for the async request
+        """
+        pool = HashingPool(max_workers=1)
+        recorded = []
+
+        def hash_password():
+            with timing('hashing'):
+                pass
+
+        async def view(request):
+            await pool.run(hash_password)
+            recorded.append(_current_timings.get().counts['hashing'])
+            return HttpResponse()
+
+        middleware = RequestTimingMiddleware(view)
+        with self.assertLogs('drf_boilerplate.timing', 'INFO') as logs:
+            response = async_to_sync(middleware)(RequestFactory().get('/'))
+
+        self.assertEqual(recorded, [1])
+        self.assertIn('hashing;dur=', response['Server-Timing'])
+        self.assertIsNone(json.loads(logs.records[0].getMessage())['view'])
+
+    def test_nested_timing_counted_once(self):
+        """
+        Hashers calling each other, like verify() calling encode(), are timed once
+        """
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        try:
+            with timing('hashing'):
+                with timing('hashing'):
+                    pass
+        finally:
+            _current_timings.reset(token)
+
+        self.assertEqual(timings.counts['hashing'], 1)
@@ -0,0 +1,16 @@
+from django.test import SimpleTestCase
+from django.test.runner import get_max_test_processes
+
+from drf_boilerplate.test_runner import ParallelDiscoverRunner
+
+
+class ParallelDiscoverRunnerTestCase(SimpleTestCase):
+    """
+    Tests to make sure the test runner runs in parallel unless told otherwise
+    """
+
+    def test_parallel_by_default(self):
+        self.assertEqual(ParallelDiscoverRunner().parallel, get_max_test_processes())
+
+    def test_parallel_option(self):
+        self.assertEqual(ParallelDiscoverRunner(parallel=1).parallel, 1)
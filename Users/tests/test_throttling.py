@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from Users.throttling import FallbackCache, get_throttle_stats
+from .helpers import APITestCase, HelperMixin, patch
+
+
+def throttle_rates(**rates):
+    """
+    Returns REST_FRAMEWORK settings with only the given throttle rates
+    """
+    return dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES=rates)
+
+
+class BrokenCache:
+    """
+    Cache which is unreachable
+    """
+
+    def get(self, *args, **kwargs):
+        raise ConnectionError('Cache server unavailable')
+
+    set = get
+
+
+class ThrottlingTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure the auth endpoints reject request floods before doing any work
+    """
+    login_url = reverse('login')
+    reset_url = reverse('password_reset:reset-password-request')
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.create_test_user()
+
+    def _login(self, username='test', ip='127.0.0.1'):
+        return self.client.post(self.login_url, {'username': username, 'password': 'wrong'}, REMOTE_ADDR=ip)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_ip='2/min'))
+    def test_ip_throttle(self):
+        """
+        Requests from the same IP are rejected once the rate is reached, without queries or hashing
+        """
+        self.assertEqual(self._login().status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self._login('other').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with patch('django.contrib.auth.hashers.check_password') as check_password, self.assertNumQueries(0):
+            response = self._login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(check_password.called)
+
+        # Other IPs are not affected
+        self.assertEqual(self._login(ip='10.0.0.1').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_ip='2/min'))
+    def test_spoofed_forwarded_for_ignored(self):
+        """
+        Without proxies in front, a client can't reset its counter by sending its own X-Forwarded-For
+        """
+        statuses = [self.client.post(self.login_url, {'username': 'test', 'password': 'wrong'},
+                                     HTTP_X_FORWARDED_FOR='10.0.0.{}'.format(i)).status_code for i in range(4)]
+
+        self.assertEqual(statuses, [status.HTTP_401_UNAUTHORIZED] * 2 + [status.HTTP_429_TOO_MANY_REQUESTS] * 2)
+
+    @override_settings(REST_FRAMEWORK=dict(throttle_rates(login_ip='1/min'), NUM_PROXIES=1))
+    def test_forwarded_for_behind_proxy(self):
+        """
+        Behind one proxy, the address it appended to X-Forwarded-For is counted, not what the client sent
+        """
+        def login(forwarded_for):
+            return self.client.post(self.login_url, {'username': 'test', 'password': 'wrong'},
+                                    HTTP_X_FORWARDED_FOR=forwarded_for, REMOTE_ADDR='172.16.0.1').status_code
+
+        self.assertEqual(login('10.0.0.1'), status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(login('1.2.3.4, 10.0.0.1'), status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(login('10.0.0.2'), status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_identity='2/min'))
+    def test_identity_throttle(self):
+        """
+        Requests for the same username are rejected whatever IP they come from
+        """
+        self._login(ip='10.0.0.1')
+        self._login(ip='10.0.0.2')
+
+        self.assertEqual(self._login(ip='10.0.0.3').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Usernames are compared case-insensitively
+        self.assertEqual(self._login('TEST', ip='10.0.0.4').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self._login('other', ip='10.0.0.5').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(password_reset_identity='1/hour'))
+    def test_password_reset_throttle(self):
+        """
+        Reset requests are throttled per email address
+        """
+        self.client.post(self.reset_url, {'email': 'test@test.com'})
+        response = self.client.post(self.reset_url, {'email': 'test@test.com'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login_ip='1/min'))
+    def test_stats(self):
+        """
+        Allowed and rejected requests are counted by scope
+        """
+        before = get_throttle_stats().get('login_ip', {'allowed': 0, 'rejected': 0})
+        self._login()
+        self._login()
+
+        after = get_throttle_stats()['login_ip']
+        self.assertEqual(after['allowed'], before['allowed'] + 1)
+        self.assertEqual(after['rejected'], before['rejected'] + 1)
+
+    def test_fallback_cache(self):
+        """
+        Counting continues in memory when the shared cache fails
+        """
+        broken_cache = patch('Users.throttling.caches', {'default': BrokenCache()})
+        fallback_cache = FallbackCache()
+
+        with broken_cache:
+            fallback_cache.set('key', [1], 60)
+            self.assertEqual(fallback_cache.get('key'), [1])
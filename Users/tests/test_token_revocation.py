@@ -0,0 +1,106 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from Users.models import UserAccount
+from Users.signals import password_changed
+from .helpers import APITestCase, HelperMixin
+
+
+class RevokeTokensTestCase(APITestCase, HelperMixin):
+    """
+    Tests to make sure refresh tokens are revoked on password change with a constant number of queries
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Set up a user account in the DB, once for all the tests of the class
+        cls.user = cls.create_test_user()
+
+    def _issue_tokens(self, count):
+        """
+        Helper function which issues the given number of refresh tokens for the user
+        :param count: Number of tokens to issue
+        """
+        for _ in range(count):
+            RefreshToken.for_user(self.user)
+
+    def _change_password(self):
+        """
+        Helper function which changes the user's password and returns the number of queries it ran
+        :return: Number of executed queries
+        """
+        self.user.set_password('abc12343245')
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save()
+        return len(queries)
+
+    def test_password_change_blacklists_all_tokens(self):
+        """
+        Every outstanding token is blacklisted after password change
+        """
+        self._issue_tokens(5)
+        # Blacklist one of them beforehand, like a logout would
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.first())
+
+        self._change_password()
+
+        self.assertEqual(BlacklistedToken.objects.filter(token__user=self.user).count(), 5)
+
+    def test_query_count_does_not_grow_with_tokens(self):
+        """
+        Revoking many tokens costs the same number of queries as revoking one
+        """
+        self._issue_tokens(1)
+        few_queries = self._change_password()
+
+        self._issue_tokens(50)
+        many_queries = self._change_password()
+
+        self.assertEqual(few_queries, many_queries)
+
+    def test_update_fields_without_password_skips_revocation(self):
+        """
+        Saving other fields, like last_login does on every login, runs no extra queries
+        """
+        self._issue_tokens(3)
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save(update_fields=['last_login'])
+
+        # Only the UPDATE itself is executed
+        self.assertEqual(len(queries), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_login_does_not_revoke_tokens(self):
+        """
+        Logging in saves last_login but neither sends password_changed nor revokes tokens
+        """
+        self._issue_tokens(3)
+        received = []
+        password_changed.connect(lambda **kwargs: received.append(kwargs['instance']), weak=False,
+                                 dispatch_uid='test_login_does_not_revoke_tokens')
+        self.addCleanup(password_changed.disconnect, dispatch_uid='test_login_does_not_revoke_tokens')
+
+        response = self.client.post(reverse('login'), {'username': 'test', 'password': 'abc123'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(received, [])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher',
+                                         'django.contrib.auth.hashers.PBKDF2PasswordHasher'])
+    def test_hash_upgrade_does_not_revoke_tokens(self):
+        """
+        Rehashing the password with a newer hasher on login is not a password change
+        """
+        self._issue_tokens(3)
+        user = UserAccount.objects.get(pk=self.user.pk)
+
+        # check_password() upgrades the PBKDF2 hash to the preferred MD5 hasher
+        self.assertTrue(user.check_password('abc123'))
+
+        self.assertTrue(UserAccount.objects.get(pk=user.pk).password.startswith('md5$'))
+        self.assertFalse(BlacklistedToken.objects.exists())
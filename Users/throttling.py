@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from drf_boilerplate.metrics import THROTTLED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def record_throttle_result(scope, allowed):
+    """
+    Counts an allowed or rejected request for the throttle scope.
+    """
+    result = 'allowed' if allowed else 'rejected'
+    with _stats_lock:
+        _stats[(scope, result)] += 1
+    THROTTLED_REQUESTS.labels(scope, result).inc()
+
+
+def get_throttle_stats():
+    """
+    :return: Number of allowed and rejected requests of this process by scope,
+    e.g. {'login_ip': {'allowed': 10, 'rejected': 2}}
+    """
+    with _stats_lock:
+        stats = {}
+        for (scope, result), count in _stats.items():
+            stats.setdefault(scope, {'allowed': 0, 'rejected': 0})[result] = count
+        return stats
+
+
+class FallbackCache:
+    """
+    Uses the shared Django cache, so all worker processes count requests together. When the
+    shared cache fails, counting carries on in this process's memory instead of failing requests.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.fallback = LocMemCache('throttle-fallback', {})
+
+    def get(self, key, default=None):
+        try:
+            return caches[self.alias].get(key, default)
+        except Exception:
+            logger.warning('Throttle cache unavailable, using the in-memory fallback', exc_info=True)
+            return self.fallback.get(key, default)
+
+    def set(self, key, value, timeout=None):
+        try:
+            caches[self.alias].set(key, value, timeout)
+        except Exception:
+            logger.warning('Throttle cache unavailable, using the in-memory fallback', exc_info=True)
+            self.fallback.set(key, value, timeout)
+
+
+class ScopedRateThrottle(SimpleRateThrottle):
+    """
+    Sliding window throttle for the auth endpoints. It is scoped by the view's `throttle_scope`,
+    with the rate of '<throttle_scope>_<scope_suffix>' in DEFAULT_THROTTLE_RATES. Views without
+    a throttle_scope, and scopes without a rate, are not throttled.
+
+    Throttles are checked before the view's handler runs, so rejected requests cost no password
+    hashing and no database queries.
+    """
+    cache = FallbackCache()
+    scope_suffix = None
+
+    def __init__(self):
+        # The rate depends on the view, so it is determined in allow_request()
+        pass
+
+    def get_rate(self):
+        # Read the rates on every request so they follow settings changes
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident_value(self, request, view):
+        """
+        :return: Value requests are counted by, or None to not throttle the request
+        """
+        raise NotImplementedError('.get_ident_value() must be overridden')
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request, view)
+        if ident is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        view_scope = getattr(view, 'throttle_scope', None)
+        if not view_scope:
+            return True
+
+        self.scope = '{}_{}'.format(view_scope, self.scope_suffix)
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        allowed = super().allow_request(request, view)
+        record_throttle_result(self.scope, allowed)
+        return allowed
+
+
+class IPRateThrottle(ScopedRateThrottle):
+    """
+    Counts requests by client IP address. X-Forwarded-For is only trusted as far as the
+    NUM_PROXIES setting says there are proxies in front of the workers.
+    """
+    scope_suffix = 'ip'
+
+    def get_ident_value(self, request, view):
+        return self.get_ident(request)
+
+
+class IdentityRateThrottle(ScopedRateThrottle):
+    """
+    Counts requests by the account they target, read from the request body field named by the
+    view's `throttle_identity_field` (e.g. username or email). Catches credential stuffing spread
+    over many IP addresses.
+    """
+    scope_suffix = 'identity'
+
+    def get_ident_value(self, request, view):
+        field = getattr(view, 'throttle_identity_field', None)
+        try:
+            value = request.data.get(field) if field else None
+        except AttributeError:
+            # Body isn't a mapping, e.g. a JSON list. The view rejects it anyway.
+            return None
+        if not isinstance(value, str) or not value:
+            return None
+        # Cache keys can't contain spaces or control characters, so use a digest
+        return hashlib.sha256(value.strip().lower().encode()).hexdigest()
+
+
+AUTH_THROTTLE_CLASSES = (IPRateThrottle, IdentityRateThrottle)
@@ -0,0 +1,36 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .blacklist import blacklist_cache
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    Refresh token which checks and updates the blacklist through Users.blacklist.blacklist_cache,
+    so repeated refresh and logout calls for a token don't each query the database.
+    """
+
+    def verify(self, *args, **kwargs):
+        # Reject expired tokens before looking them up in the blacklist
+        tokens.Token.verify(self, *args, **kwargs)
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+
+        blacklisted = blacklist_cache.get(jti)
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            blacklist_cache.set(jti, self.payload['exp'], blacklisted)
+
+        if blacklisted:
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        blacklisted_token = super().blacklist()
+        blacklist_cache.set(self.payload[api_settings.JTI_CLAIM], self.payload['exp'], True)
+
+        return blacklisted_token
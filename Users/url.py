@@ -1,13 +1,29 @@
+from django.conf import settings
 from django.urls import path, include
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenBlacklistView
+from rest_framework_simplejwt.views import TokenRefreshView, TokenBlacklistView
 
-from .views import RegisterUser, ChangePasswordView
+from .views import (LoginView, RegisterUser, BulkRegisterUsers, ChangePasswordView, PasswordResetRequestView,
+                    PasswordResetValidateTokenView, PasswordResetConfirmView, AsyncLoginView, AsyncRegisterUser,
+                    AsyncChangePasswordView)
+
+if settings.ASYNC_AUTH_VIEWS:
+    login_view, register_view, change_password_view = AsyncLoginView, AsyncRegisterUser, AsyncChangePasswordView
+else:
+    login_view, register_view, change_password_view = LoginView, RegisterUser, ChangePasswordView
+
+# Same routes as django_rest_passwordreset.urls, with throttled views
+password_reset_urlpatterns = [
+    path('validate_token/', PasswordResetValidateTokenView.as_view(), name='reset-password-validate'),
+    path('confirm/', PasswordResetConfirmView.as_view(), name='reset-password-confirm'),
+    path('', PasswordResetRequestView.as_view(), name='reset-password-request'),
+]
 
 urlpatterns = [
-    path('login/', TokenObtainPairView.as_view(), name='login'),
+    path('login/', login_view.as_view(), name='login'),
     path('logout/', TokenBlacklistView.as_view(), name='logout'),
     path('login/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('register/', RegisterUser.as_view(), name="sign_up"),
-    path('change_password/', ChangePasswordView.as_view(), name='change_password'),
-    path('password_reset/', include('django_rest_passwordreset.urls', namespace='password_reset')),
+    path('register/', register_view.as_view(), name="sign_up"),
+    path('bulk_register/', BulkRegisterUsers.as_view(), name='bulk_register'),
+    path('change_password/', change_password_view.as_view(), name='change_password'),
+    path('password_reset/', include((password_reset_urlpatterns, 'password_reset'))),
 ]
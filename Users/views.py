@@ -1,12 +1,42 @@
+import io
+
+from adrf.views import APIView as AsyncAPIView
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django_rest_passwordreset.views import (ResetPasswordConfirm, ResetPasswordRequestToken,
+                                             ResetPasswordValidateToken)
 from rest_framework import status, generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.views import TokenObtainPairView
 
+from .bulk import detect_format, import_users, read_rows
+from .hashing import get_hashing_pool
+from .models import UserAccount
 from .serializers import UserAccountSerializer, ChangePasswordSerializer
+from .throttling import AUTH_THROTTLE_CLASSES
 from rest_framework.response import Response
 
+# Views below set throttle_scope, which picks their rates in DEFAULT_THROTTLE_RATES
+# (see Users/throttling.py), and throttle_identity_field, the request field naming the
+# account which is throttled on its own.
+
+
+class LoginView(TokenObtainPairView):
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'login'
+    throttle_identity_field = UserAccount.USERNAME_FIELD
+
 
 class RegisterUser(APIView):
     http_method_names = ['post']
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'register'
 
     def post(self, request):
         serializer = UserAccountSerializer(data=request.data)
@@ -17,12 +47,52 @@ class RegisterUser(APIView):
                         status=status.HTTP_201_CREATED)
 
 
+class BulkRegisterUsers(APIView):
+    """
+    Registers the users of an uploaded CSV or JSON Lines file, sent as the "file" field of a
+    multipart form. The file type is taken from the "format" field (csv or jsonl) or the file
+    name. Rows are validated like registrations and the ones with errors are reported by line
+    number, the others are created. Only staff users can access it.
+
+    The file is imported while the request waits, so its size and number of rows are limited by
+    settings.BULK_IMPORT's MAX_UPLOAD_SIZE and MAX_UPLOAD_ROWS, to fit settings.WORKER_TIMEOUT. Passwords are hashed in the worker
+    itself, without starting processes; the import_users command is meant for bigger files.
+    """
+    http_method_names = ['post']
+    permission_classes = (IsAdminUser,)
+    parser_classes = (MultiPartParser,)
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': ['No file was submitted.']})
+        config = getattr(settings, 'BULK_IMPORT', {})
+        max_size = config.get('MAX_UPLOAD_SIZE')
+        if max_size and upload.size > max_size:
+            raise ValidationError({'file': ['The file is larger than {} bytes, import it with the import_users '
+                                            'command instead.'.format(max_size)]})
+        try:
+            file_format = request.data.get('format') or detect_format(upload.name)
+            # Read as the rows are imported, big uploads are kept in a temporary file by Django
+            rows = read_rows(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''), file_format)
+        except ValueError as e:
+            raise ValidationError({'format': [str(e)]})
+
+        # Rows are validated and created batch by batch, the result lists the rows which failed.
+        # Forking hashing processes from a (multi-threaded) web worker isn't safe, hash in this one.
+        result = import_users(rows, batch_size=config.get('UPLOAD_BATCH_SIZE'), processes=1,
+                              max_rows=config.get('MAX_UPLOAD_ROWS'))
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+
 class ChangePasswordView(generics.UpdateAPIView):
     """
     Profile page view where user can change their own password.
     """
     serializer_class = ChangePasswordSerializer
     http_method_names = ['put']
+    # Changing the password needs the real user object, so load it from the database
+    authentication_classes = (JWTAuthentication,)
 
     def get_object(self, queryset=None):
         """
@@ -39,3 +109,101 @@ class ChangePasswordView(generics.UpdateAPIView):
             return Response({'error': 'You are not logged in.'}, status=status.HTTP_400_BAD_REQUEST)
         # Pass the updating part to ChangePasswordSerializer
         return super().update(request, *args, **kwargs)
+
+
+class PasswordResetRequestView(ResetPasswordRequestToken):
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'password_reset'
+    throttle_identity_field = 'email'
+
+
+class PasswordResetValidateTokenView(ResetPasswordValidateToken):
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'password_reset_token'
+
+
+class PasswordResetConfirmView(ResetPasswordConfirm):
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'password_reset_token'
+
+
+###############
+# Async views #
+###############
+
+# Used instead of the views above when ASYNC_AUTH_VIEWS is on and the project runs under ASGI.
+# Validation and saving check or hash passwords, so they run in the hashing pool (see
+# Users/hashing.py) while the event loop keeps serving other requests.
+
+
+class AsyncRegisterUser(AsyncAPIView):
+    http_method_names = ['post']
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'register'
+
+    @staticmethod
+    def _register(serializer):
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    async def post(self, request):
+        serializer = UserAccountSerializer(data=request.data)
+        await get_hashing_pool().run(self._register, serializer)
+
+        return Response({'data': 'User {} created successfully'.format(serializer.data['username'])},
+                        status=status.HTTP_201_CREATED)
+
+
+class AsyncLoginView(AsyncAPIView):
+    """
+    Async version of simplejwt's TokenObtainPairView.
+    """
+    http_method_names = ['post']
+    authentication_classes = ()
+    permission_classes = ()
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = 'login'
+    throttle_identity_field = UserAccount.USERNAME_FIELD
+    www_authenticate_realm = 'api'
+
+    def get_authenticate_header(self, request):
+        # Needed for wrong credentials to be answered with 401 instead of 403
+        return '{} realm="{}"'.format(api_settings.AUTH_HEADER_TYPES[0], self.www_authenticate_realm)
+
+    @staticmethod
+    def _validate(serializer):
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+    async def post(self, request):
+        serializer_class = import_string(api_settings.TOKEN_OBTAIN_SERIALIZER)
+        serializer = serializer_class(data=request.data, context={'request': request, 'view': self})
+        await get_hashing_pool().run(self._validate, serializer)
+
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
+class AsyncChangePasswordView(AsyncAPIView):
+    """
+    Async version of ChangePasswordView.
+    """
+    http_method_names = ['put']
+    # Changing the password needs the real user object, so load it from the database
+    authentication_classes = (JWTAuthentication,)
+
+    @staticmethod
+    def _change_password(serializer):
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    async def put(self, request):
+        # If in case user is not authenticated, throw this error
+        if not request.user.is_authenticated:
+            return Response({'error': 'You are not logged in.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = ChangePasswordSerializer(request.user, data=request.data, context={'request': request})
+        await get_hashing_pool().run(self._change_password, serializer)
+
+        return Response(serializer.data)
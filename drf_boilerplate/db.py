@@ -0,0 +1,17 @@
+from django.db import connections
+
+
+def get_pool_stats():
+    """
+    Collects the connection pool statistics of this process, e.g. pool_size, pool_available,
+    requests_waiting and requests_wait_ms. See psycopg_pool's ConnectionPool.get_stats().
+
+    :return: Dictionary of statistics by database alias, for the databases using a pool
+    """
+    stats = {}
+    for alias in connections:
+        # Only the PostgreSQL backend has a pool, and only when OPTIONS['pool'] is set
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
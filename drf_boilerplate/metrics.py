@@ -0,0 +1,190 @@
+"""
+Prometheus metrics of the project, exposed by metrics_view at /metrics/.
+
+With several worker processes (e.g. gunicorn), set the PROMETHEUS_MULTIPROC_DIR environment
+variable to an empty directory writable by the workers. Every worker then writes its metrics
+there and a scrape served by any of them reports the sum over all of them. gunicorn.conf.py
+cleans the directory up when workers start and exit.
+"""
+import os
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST,
+                               generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .db import get_pool_stats
+
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+REQUESTS = Counter('http_requests', 'Handled requests', ['view', 'method', 'status'])
+REQUEST_DURATION = Histogram('http_request_duration_seconds', 'Time taken to handle requests', ['view', 'method'],
+                             # Password hashing puts the auth endpoints in the hundreds of milliseconds
+                             buckets=(.005, .01, .025, .05, .1, .25, .5, .75, 1, 1.5, 2.5, 5, 10))
+THROTTLED_REQUESTS = Counter('auth_throttle_requests', 'Requests checked by the auth throttles',
+                             ['scope', 'result'])
+
+# Gauges of the worker processes, summed over the live ones in multiprocess mode
+MAIL_QUEUE_DEPTH = Gauge('mail_queue_depth', 'Emails waiting to be sent', multiprocess_mode='livesum')
+HASHING_POOL_PENDING = Gauge('hashing_pool_pending', 'Password hashing calls running or waiting for a thread',
+                             multiprocess_mode='livesum')
+DB_POOL_SIZE = Gauge('db_pool_size', 'Connections in the database pools', ['alias'], multiprocess_mode='livesum')
+DB_POOL_AVAILABLE = Gauge('db_pool_available', 'Idle connections in the database pools', ['alias'],
+                          multiprocess_mode='livesum')
+DB_POOL_WAITING = Gauge('db_pool_requests_waiting', 'Requests waiting for a pooled connection', ['alias'],
+                        multiprocess_mode='livesum')
+
+_gauges_updated = 0.0
+_gauges_lock = threading.Lock()
+
+
+def observe_request(view, method, status, seconds):
+    REQUESTS.labels(view, method, status).inc()
+    REQUEST_DURATION.labels(view, method).observe(seconds)
+
+
+class MetricsMiddleware:
+    """
+    Counts the requests and measures their duration by view name, method and status. Requests
+    which don't match a URL pattern are counted under the view name "unmatched".
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def _observe(request, response, seconds):
+        match = request.resolver_match
+        observe_request(match.view_name if match else 'unmatched', request.method, response.status_code, seconds)
+        update_process_gauges()
+
+
+def update_process_gauges(force=False):
+    """
+    Sets the gauges of this process. Called after requests, at most once per
+    settings.METRICS['GAUGE_INTERVAL'] seconds, and on scrapes.
+    """
+    global _gauges_updated
+    now = time.monotonic()
+    with _gauges_lock:
+        if not force and now - _gauges_updated < settings.METRICS['GAUGE_INTERVAL']:
+            return
+        _gauges_updated = now
+
+    # Imported here, Users' modules import this project's modules
+    from Users.hashing import get_hashing_pool
+    from Users.mail import get_mail_queue
+
+    MAIL_QUEUE_DEPTH.set(get_mail_queue().qsize())
+    HASHING_POOL_PENDING.set(get_hashing_pool().pending)
+    for alias, stats in get_pool_stats().items():
+        DB_POOL_SIZE.labels(alias).set(stats.get('pool_size', 0))
+        DB_POOL_AVAILABLE.labels(alias).set(stats.get('pool_available', 0))
+        DB_POOL_WAITING.labels(alias).set(stats.get('requests_waiting', 0))
+
+
+class TokenCountCollector:
+    """
+    Approximate number of rows in the refresh token tables. On PostgreSQL they come from the
+    planner statistics in pg_class, which autovacuum keeps up to date, instead of counting every
+    row of tables that grow with each refresh. Other databases fall back to COUNT(*). Either
+    way the result is reused for settings.METRICS['TOKEN_COUNT_INTERVAL'] seconds.
+    """
+    models = {'outstanding': OutstandingToken, 'blacklisted': BlacklistedToken}
+
+    def __init__(self):
+        self._counts = None
+        self._updated = 0.0
+        self._lock = threading.Lock()
+
+    def counts(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._counts is None or now - self._updated >= settings.METRICS['TOKEN_COUNT_INTERVAL']:
+                self._counts = self._query()
+                self._updated = now
+            return self._counts
+
+    def _query(self):
+        counts = {}
+        if connection.vendor == 'postgresql':
+            tables = {model._meta.db_table: name for name, model in self.models.items()}
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT relname, reltuples FROM pg_class WHERE relname = ANY(%s) AND relkind = %s',
+                               [list(tables), 'r'])
+                for table, reltuples in cursor.fetchall():
+                    # reltuples is -1 until the table is vacuumed or analyzed for the first time
+                    if reltuples >= 0:
+                        counts[tables[table]] = int(reltuples)
+
+        for name, model in self.models.items():
+            if name not in counts:
+                counts[name] = model.objects.count()
+        return counts
+
+    @staticmethod
+    def _gauge():
+        return GaugeMetricFamily('auth_tokens', 'Approximate number of refresh token rows', labels=['table'])
+
+    def describe(self):
+        # Lets the registry check metric names without querying the database
+        yield self._gauge()
+
+    def collect(self):
+        gauge = self._gauge()
+        for name, count in self.counts().items():
+            gauge.add_metric([name], count)
+        yield gauge
+
+
+token_count_collector = TokenCountCollector()
+if not MULTIPROCESS:
+    REGISTRY.register(token_count_collector)
+
+
+def metrics_view(request):
+    """
+    Prometheus exposition of the metrics. When settings.METRICS['TOKEN'] is set, scrapers must send
+    it in an "Authorization: Bearer <token>" header. Without a token, the metrics are only served when
+    settings.METRICS['ALLOW_ANONYMOUS'] is on, as it is in development.
+    """
+    token = settings.METRICS.get('TOKEN')
+    if not token and not settings.METRICS.get('ALLOW_ANONYMOUS', False):
+        return HttpResponseForbidden()
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), 'Bearer ' + token):
+        return HttpResponseForbidden()
+
+    update_process_gauges(force=True)
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(token_count_collector)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,152 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as message_middleware
+from django.contrib.sessions import middleware as session_middleware
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.middleware import clickjacking, csrf
+
+from .timing import RequestTimings, _current_timings, timing
+
+logger = logging.getLogger('drf_boilerplate.timing')
+
+
+def _time_query(execute, sql, params, many, context):
+    with timing('db'):
+        return execute(sql, params, many, context)
+
+
+def _install_query_timer(connection):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+@receiver(connection_created)
+def _on_connection_created(connection, **kwargs):
+    # Connections are per thread, this covers the ones opened by any thread serving a request
+    _install_query_timer(connection)
+
+
+class RequestTimingMiddleware:
+    """
+    Records the wall time, database time, number of queries and password hashing time of a sample
+    of the requests, as set by settings.REQUEST_TIMING. Each timed request is logged as a JSON
+    object by the 'drf_boilerplate.timing' logger and can get a Server-Timing header, which
+    browser dev tools show next to the request.
+
+    Put it first in MIDDLEWARE so the wall time includes the other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings = self._start()
+        if timings is None:
+            return self.get_response(request)
+
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = self._start()
+        if timings is None:
+            return await self.get_response(request)
+
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - started)
+
+    @staticmethod
+    def _start():
+        """
+        :return: RequestTimings for a sampled request, None otherwise
+        """
+        sample_rate = settings.REQUEST_TIMING.get('SAMPLE_RATE', 0)
+        if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+            return None
+
+        # Connections opened before this module was loaded miss the query timer
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(connection)
+        return RequestTimings()
+
+    @staticmethod
+    def _finish(request, response, timings, seconds):
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(seconds * 1000, 2),
+            'db_ms': round(timings.durations['db'] * 1000, 2),
+            'queries': timings.counts['db'],
+            'hashing_ms': round(timings.durations['hashing'] * 1000, 2),
+        }
+        logger.info(json.dumps(record), extra={'timing': record})
+
+        if settings.REQUEST_TIMING.get('SERVER_TIMING_HEADER', False):
+            response['Server-Timing'] = ', '.join((
+                'total;dur={}'.format(record['total_ms']),
+                'db;dur={};desc="{} queries"'.format(record['db_ms'], record['queries']),
+                'hashing;dur={}'.format(record['hashing_ms']),
+            ))
+        return response
+
+
+class APIPathExemptMixin:
+    """
+    Skips the middleware for requests under one of settings.API_PATH_PREFIXES. The API only
+    authenticates with JWTs, so sessions, the session user, messages and CSRF cookies are only
+    needed by the admin and have nothing to do on API requests.
+    """
+
+    def __call__(self, request):
+        if request.path_info.startswith(tuple(settings.API_PATH_PREFIXES)):
+            # Returns the awaitable of the next middleware as is in async mode
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(APIPathExemptMixin, session_middleware.SessionMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(APIPathExemptMixin, auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(APIPathExemptMixin, message_middleware.MessageMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(APIPathExemptMixin, csrf.CsrfViewMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(APIPathExemptMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
@@ -0,0 +1,73 @@
+"""
+JSON renderer, parser and content negotiation of the API. orjson is used when it is installed,
+otherwise they behave exactly like DRF's JSONRenderer and JSONParser.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # Non-string keys are converted like json.dumps does. Dates and times go to DRF's encoder, so
+    # they are formatted the same way with or without orjson (e.g. "Z" for UTC).
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders compact, UTF-8 JSON with orjson. Types orjson doesn't know (lazy translations, Decimal,
+    dates and times...) are converted by DRF's encoder. Indented output, asked for with
+    "Accept: application/json; indent=4", is left to DRF's renderer.
+    """
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        ret = orjson.dumps(data, default=self._encoder.default, option=ORJSON_OPTIONS)
+        # Like DRF, escape \u2028 and \u2029 so the output is a strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """
+    Parses JSON request bodies with orjson.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            # orjson rejects NaN and Infinity, like DRF's strict JSON parsing
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class JSONOnlyContentNegotiation(DefaultContentNegotiation):
+    """
+    With a single renderer, uses it without looking at the client's Accept header. Clients asking
+    for anything else get JSON rather than a 406 error, and requests skip parsing the header.
+    With more renderers, e.g. the browsable API in development, negotiates as DRF does.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if len(renderers) == 1:
+            return renderers[0], renderers[0].media_type
+        return super().select_renderer(request, renderers, format_suffix)
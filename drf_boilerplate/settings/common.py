@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+from datetime import timedelta
 from os.path import dirname, abspath, basename, join
 from pathlib import Path
 
@@ -38,7 +39,8 @@ PROJECT_TEMPLATES = [
 SECRET_KEY = os.environ['secret_key']
 
 # Check env flag to determine if this is production or development environment
-if os.getenv('DJANGO_DEVELOPMENT', 'False') == 'True':
+DEVELOPMENT = os.getenv('DJANGO_DEVELOPMENT', 'False') == 'True'
+if DEVELOPMENT:
     from .settings_development import *
 else:
     from .settings_production import *
@@ -78,9 +80,37 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'drf_boilerplate.wsgi.application'
 
+# Set api_only to True on workers which only serve the API. They leave out the admin, sessions and
+# messages apps and the middleware only the admin needs, so they start and handle requests faster.
+# Serve /admin/ from workers without api_only, e.g. routed to them by the proxy.
+API_ONLY = os.getenv('api_only', 'False') == 'True'
+
+if API_ONLY:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in (
+        'django.contrib.admin',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+    )]
+    # Both Django's classes and the ones of drf_boilerplate.middleware
+    MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware.rsplit('.', 1)[1] not in (
+        'SessionMiddleware',
+        'CsrfViewMiddleware',
+        'AuthenticationMiddleware',
+        'MessageMiddleware',
+        'XFrameOptionsMiddleware',
+    )]
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove('django.contrib.messages.context_processors.messages')
+    ROOT_URLCONF = 'drf_boilerplate.urls_api'
+
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Set db_pool to True to keep a psycopg connection pool in every worker process. Otherwise each
+# worker thread keeps its own connection open for db_conn_max_age seconds. Either way requests
+# don't pay for a new connection and authentication handshake. With the pool, size workers so that
+# workers * db_pool_max_size stays below the server's max_connections.
+DB_POOL = os.getenv('db_pool', 'False') == 'True'
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -89,7 +119,70 @@ DATABASES = {
         'PASSWORD': os.environ['db_pass'],
         'HOST': os.environ['db_host'],
         'PORT': os.environ['db_port'],
+        # The pool manages connection lifetime itself, so persistent connections must be off with it
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('db_conn_max_age', '60')),
+        # Check reused connections before handing them to a request. With the pool this runs
+        # psycopg_pool's ConnectionPool.check_connection on checkout.
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        # Passed to psycopg_pool.ConnectionPool
+        'pool': {
+            'min_size': int(os.getenv('db_pool_min_size', '2')),
+            'max_size': int(os.getenv('db_pool_max_size', '10')),
+            # Seconds a request waits for a free connection before failing
+            'timeout': float(os.getenv('db_pool_timeout', '10')),
+            # Seconds before idle connections above min_size are closed
+            'max_idle': float(os.getenv('db_pool_max_idle', '600')),
+            # Seconds before a connection is replaced, so server-side memory doesn't build up
+            'max_lifetime': float(os.getenv('db_pool_max_lifetime', '3600')),
+        },
     }
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.0/topics/auth/passwords/
+
+# Hashers users can log in with, by profile name. See Users/hashers.py
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'Users.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'Users.hashers.ScryptPasswordHasher',
+    'argon2': 'Users.hashers.Argon2PasswordHasher',
+}
+
+# New passwords are hashed with the password_hasher profile. Passwords hashed by any other
+# profile are still accepted and rehashed with this one on the next login. Django's other default
+# hashers (pbkdf2_sha1, bcrypt_sha256) are left out: passwords stored with them can't be verified.
+PASSWORD_HASHER = os.getenv('password_hasher', 'pbkdf2')
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_PROFILES.items() if name != PASSWORD_HASHER
+]
+
+
+def _hasher_param(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+# Cost parameters by hasher algorithm. Unset (None) values use Django's defaults. Changing one
+# rehashes passwords on the next login. Use the benchmark_hashers command to pick them.
+PASSWORD_HASHER_PARAMS = {
+    'pbkdf2_sha256': {
+        'iterations': _hasher_param('pbkdf2_iterations'),
+    },
+    'scrypt': {
+        'work_factor': _hasher_param('scrypt_work_factor'),
+        'block_size': _hasher_param('scrypt_block_size'),
+        'parallelism': _hasher_param('scrypt_parallelism'),
+    },
+    'argon2': {
+        'time_cost': _hasher_param('argon2_time_cost'),
+        'memory_cost': _hasher_param('argon2_memory_cost'),
+        'parallelism': _hasher_param('argon2_parallelism'),
+    },
 }
 
 # Password validation
@@ -112,9 +205,148 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'Users.authentication.StatelessJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': API_RENDERER_CLASSES,
+    # JSON only, parsed with orjson when it is installed (see drf_boilerplate/renderers.py)
+    'DEFAULT_PARSER_CLASSES': (
+        'drf_boilerplate.renderers.FastJSONParser',
     ),
-    'TEST_REQUEST_DEFAULT_FORMAT': 'json'
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'drf_boilerplate.renderers.JSONOnlyContentNegotiation',
+    'TEST_REQUEST_DEFAULT_FORMAT': 'json',
+    # Number of proxies in front of the workers which append the client address to X-Forwarded-For.
+    # Throttles count requests by the address the last of them saw. With 0, the header is ignored and
+    # REMOTE_ADDR is used, so clients can't pick their own address by sending the header.
+    'NUM_PROXIES': NUM_PROXIES,
+    # Sliding window limits of the auth endpoints (see Users/throttling.py), counted in the
+    # default cache. "_ip" rates count requests per client IP, "_identity" rates count requests
+    # per username/email. Remove a rate to turn that throttle off.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_identity': '10/min',
+        'register_ip': '10/hour',
+        'password_reset_ip': '10/hour',
+        'password_reset_identity': '3/hour',
+        'password_reset_token_ip': '30/hour',
+    },
+}
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(hours=12),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
+    'UPDATE_LAST_LOGIN': True,
+
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
+
+    'TOKEN_OBTAIN_SERIALIZER': 'Users.serializers.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'Users.serializers.TokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'Users.serializers.TokenBlacklistSerializer',
+    'TOKEN_USER_CLASS': 'Users.authentication.TokenUser',
+}
+
+# Requests under these paths skip the session, authentication, messages, CSRF and clickjacking
+# middleware of drf_boilerplate.middleware. The API authenticates with JWTs only.
+API_PATH_PREFIXES = ('/account/', '/status/', '/metrics/')
+
+# Refresh token blacklist lookups cache (see Users/blacklist.py)
+TOKEN_BLACKLIST_CACHE = {
+    # Shared between processes, the production settings require redis_url for it
+    'CACHE_ALIAS': 'default',
+    # Number of blacklisted tokens remembered in each process
+    'LOCAL_MAX_SIZE': 10000,
+    # Seconds to remember that a token is not blacklisted
+    'NEGATIVE_TIMEOUT': 30,
+}
+
+# Outbound mail queue used for password reset emails (see Users/mail.py)
+MAIL_QUEUE = {
+    'BACKEND': 'Users.mail.ThreadedMailQueue',
+    'OPTIONS': {
+        'max_size': 1000,
+        'batch_size': 50,
+        'max_retries': 3,
+        'backoff': 1.0,
+    },
+    # Seconds a stopping worker waits for queued messages to be sent
+    'SHUTDOWN_TIMEOUT': 10,
+}
+
+# Set async_views to True when serving the project with an ASGI server (e.g. gunicorn with uvicorn
+# workers) to use the async login, register and change password views. Their password hashing
+# runs in a bounded thread pool, so one worker can handle many auth requests at once.
+ASYNC_AUTH_VIEWS = os.getenv('async_views', 'False') == 'True'
+
+# Pool used by the async views for password hashing (see Users/hashing.py)
+HASHING_POOL = {
+    # Number of hashing threads in each worker process
+    'MAX_WORKERS': int(os.getenv('hashing_pool_workers', '4')),
+    # Number of requests which can wait for a thread. Requests beyond that get HTTP 503
+    'MAX_QUEUE': int(os.getenv('hashing_pool_queue', '64')),
+    # Number of processes hashing the passwords of batch jobs, e.g. UserAccount.objects.create_users()
+    # and bulk imports. 0 for one per core
+    'PROCESSES': int(os.getenv('hashing_pool_processes', '0')),
+}
+
+# Seconds gunicorn lets a request run before killing its worker, set by gunicorn.conf.py from the
+# same variable
+WORKER_TIMEOUT = int(os.getenv('worker_timeout', '30'))
+
+# Bulk user import of the import_users command and the bulk registration endpoint (see Users/bulk.py)
+BULK_IMPORT = {
+    # Rows validated, hashed and inserted together, each batch in its own transaction
+    'BATCH_SIZE': int(os.getenv('bulk_import_batch_size', '1000')),
+    # Row errors listed in the result, the others are only counted
+    'MAX_ERRORS': 1000,
+    # Limits of the files uploaded to the bulk registration endpoint, which imports them while the
+    # request waits. Bigger files are imported with the import_users command. Each row costs a
+    # password hash (0.35 to 0.6 s with the default pbkdf2 cost), so the rows must be hashed within
+    # half of WORKER_TIMEOUT. Lower MAX_UPLOAD_ROWS when raising the hasher costs.
+    'MAX_UPLOAD_SIZE': 1024 * 1024,
+    'MAX_UPLOAD_ROWS': 20,
+    # Rows per batch of uploads, so their users are committed as the import goes
+    'UPLOAD_BATCH_SIZE': 10,
+}
+
+# Request timing of drf_boilerplate.middleware.RequestTimingMiddleware
+REQUEST_TIMING = {
+    # Fraction of requests which are timed and logged, from 0 (none) to 1 (all)
+    'SAMPLE_RATE': float(os.getenv('request_timing_sample_rate', '1.0' if DEVELOPMENT else '0.01')),
+    # Adds a Server-Timing header to timed responses. It tells clients how long hashing and queries
+    # took, so it is only on in development by default
+    'SERVER_TIMING_HEADER': os.getenv('server_timing_header', str(DEVELOPMENT)) == 'True',
+}
+
+# Prometheus metrics served at /metrics/ (see drf_boilerplate/metrics.py)
+METRICS = {
+    # When set, scrapers must send an "Authorization: Bearer <token>" header
+    'TOKEN': os.getenv('metrics_token', ''),
+    # Whether /metrics/ is public when no token is set. Otherwise it answers 403 until metrics_token is set.
+    'ALLOW_ANONYMOUS': DEVELOPMENT,
+    # Seconds between updates of a worker's mail queue, hashing pool and connection pool gauges
+    'GAUGE_INTERVAL': 1,
+    # Seconds the token table row counts are reused for
+    'TOKEN_COUNT_INTERVAL': 60,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # One JSON object per timed request
+        'drf_boilerplate.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 # Internationalization
@@ -144,3 +376,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Default authentication model
 AUTH_USER_MODEL = 'Users.UserAccount'
+
+# Set login_with_email to True for users to log in with their email, matched case-insensitively,
+# instead of their username. The login request then has an "email" field instead of "username".
+LOGIN_WITH_EMAIL = os.getenv('login_with_email', 'False') == 'True'
@@ -1,4 +1,4 @@
-from datetime import timedelta
+import os
 from os.path import dirname, abspath, join
 
 from pathlib import Path
@@ -12,15 +12,21 @@ DEBUG = True
 ALLOWED_HOSTS = ['*']
 
 MIDDLEWARE = [
+    'drf_boilerplate.metrics.MetricsMiddleware',
+    'drf_boilerplate.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # The drf_boilerplate classes are skipped on the API paths, see API_PATH_PREFIXES
+    'drf_boilerplate.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'drf_boilerplate.middleware.CsrfViewMiddleware',
+    'drf_boilerplate.middleware.AuthenticationMiddleware',
+    'drf_boilerplate.middleware.MessageMiddleware',
+    'drf_boilerplate.middleware.XFrameOptionsMiddleware',
 ]
 
+# The CSRF and clickjacking checks look for Django's classes by name, the subclasses above are in place
+SILENCED_SYSTEM_CHECKS = ['security.W002', 'security.W003']
+
 # fetch the project_root
 DJANGO_ROOT = dirname(dirname(abspath(__file__)))
 PROJECT_ROOT = dirname(DJANGO_ROOT)
@@ -41,13 +47,11 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_ALLOW_CREDENTIALS = True
 
-SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(hours=12),
-    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-    'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+# Clients connect to the development server directly (see REST_FRAMEWORK['NUM_PROXIES'] in common.py)
+NUM_PROXIES = int(os.getenv('num_proxies', '0'))
 
-    'AUTH_HEADER_TYPES': ('Bearer',),
-    'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
-}
+# JSON, plus DRF's browsable API to try the endpoints out in a browser
+API_RENDERER_CLASSES = (
+    'drf_boilerplate.renderers.FastJSONRenderer',
+    'rest_framework.renderers.BrowsableAPIRenderer',
+)
@@ -0,0 +1,79 @@
+import os
+from os.path import dirname, abspath, join
+
+from django.core.exceptions import ImproperlyConfigured
+
+# ##### PRODUCTION CONFIGURATION ##########################
+DEBUG = False
+
+# Comma separated host names the API is served under, e.g. "api.example.com,example.com"
+ALLOWED_HOSTS = [host.strip() for host in os.getenv('allowed_hosts', '').split(',') if host.strip()]
+
+# Origins allowed to post the admin login form, e.g. "https://api.example.com"
+CSRF_TRUSTED_ORIGINS = [origin.strip() for origin in os.getenv('csrf_trusted_origins', '').split(',')
+                        if origin.strip()]
+
+# Requests under settings.API_PATH_PREFIXES skip the session, authentication, messages, CSRF and
+# clickjacking middleware, which only the admin needs. The API authenticates with JWTs only.
+MIDDLEWARE = [
+    'drf_boilerplate.metrics.MetricsMiddleware',
+    'drf_boilerplate.middleware.RequestTimingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'drf_boilerplate.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'drf_boilerplate.middleware.CsrfViewMiddleware',
+    'drf_boilerplate.middleware.AuthenticationMiddleware',
+    'drf_boilerplate.middleware.MessageMiddleware',
+    'drf_boilerplate.middleware.XFrameOptionsMiddleware',
+]
+
+# The CSRF and clickjacking checks look for Django's classes by name, the subclasses above are in place
+SILENCED_SYSTEM_CHECKS = ['security.W002', 'security.W003']
+
+# TLS is terminated by the proxy in front of the workers, which sets X-Forwarded-Proto
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+# Number of proxies appending the client address to X-Forwarded-For, read by the IP throttles (see
+# REST_FRAMEWORK['NUM_PROXIES'] in common.py). Set num_proxies to 0 when clients connect directly.
+NUM_PROXIES = int(os.getenv('num_proxies', '1'))
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+SECURE_CONTENT_TYPE_NOSNIFF = True
+
+# JSON only, rendered with orjson when it is installed (see drf_boilerplate/renderers.py). The
+# browsable API renders an HTML page with forms for every response to a browser, and its
+# negotiation and imports are wasted on API clients.
+API_RENDERER_CLASSES = (
+    'drf_boilerplate.renderers.FastJSONRenderer',
+)
+
+# Shared cache of the throttle counters and the token blacklist (see Users/throttling.py and
+# Users/blacklist.py). A cache of each worker process would let workers accept tokens revoked by
+# another one, and multiply the throttle rates by the number of workers, so it is required.
+if not os.getenv('redis_url'):
+    raise ImproperlyConfigured('Set redis_url, the production settings need a cache shared by the workers')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['redis_url'],
+        'TIMEOUT': 300,
+    }
+}
+
+# Password reset emails are sent through SMTP by the mail queue's worker thread (see Users/mail.py)
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = os.getenv('email_host', 'localhost')
+EMAIL_PORT = int(os.getenv('email_port', '587'))
+EMAIL_HOST_USER = os.getenv('email_host_user', '')
+EMAIL_HOST_PASSWORD = os.getenv('email_host_password', '')
+EMAIL_USE_TLS = os.getenv('email_use_tls', 'True') == 'True'
+# Seconds before a stuck mail server connection is given up, so the worker moves on to a retry
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.getenv('default_from_email', 'webmaster@localhost')
+
+# Templates (the admin's and the password reset email) are compiled once per process by the
+# cached template loader. Django uses it whenever TEMPLATES sets no 'loaders', as common.py does.
+
+# fetch the project_root
+PROJECT_ROOT = dirname(dirname(dirname(abspath(__file__))))
+# collect static files here
+STATIC_ROOT = join(PROJECT_ROOT, 'run', 'static')
@@ -0,0 +1,50 @@
+"""
+Settings of the test suite, run with:
+
+    python manage.py test --settings=drf_boilerplate.settings.settings_test
+
+Test classes run in parallel, one process per core, each with its own copy of the test database.
+"""
+import os
+
+# common.py reads these from the environment, the tests don't need real ones
+os.environ.setdefault('secret_key', 'insecure-test-secret-key-used-to-sign-the-tokens-of-the-test-suite')
+os.environ.setdefault('DJANGO_DEVELOPMENT', 'True')
+for name in ('db_name', 'db_user', 'db_pass', 'db_host', 'db_port'):
+    os.environ.setdefault(name, '')
+
+# The lowest costs of the hashers, for the many users the tests create. Passwords go through the
+# same hashers as in production, the hasher tests set their own costs.
+os.environ.setdefault('pbkdf2_iterations', '1000')
+os.environ.setdefault('scrypt_work_factor', '16')
+os.environ.setdefault('scrypt_parallelism', '1')
+os.environ.setdefault('argon2_time_cost', '1')
+os.environ.setdefault('argon2_memory_cost', '8')
+os.environ.setdefault('argon2_parallelism', '1')
+
+from .common import *
+
+# Set test_database to postgres to run the tests against the database configured by the db_*
+# variables, e.g. in CI before a release. The in-memory SQLite database needs no server.
+if os.getenv('test_database', 'sqlite') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+    }
+
+# Emails stay in the memory of the test process instead of being sent by a background thread
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+MAIL_QUEUE = dict(MAIL_QUEUE, BACKEND='Users.mail.LocMemMailQueue', OPTIONS={})
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Timing tests turn it on for themselves
+REQUEST_TIMING = dict(REQUEST_TIMING, SAMPLE_RATE=0)
+
+TEST_RUNNER = 'drf_boilerplate.test_runner.ParallelDiscoverRunner'
@@ -0,0 +1,18 @@
+"""
+Startup work of the worker processes, see drf_boilerplate/wsgi.py and drf_boilerplate/asgi.py.
+"""
+from django.contrib.auth.hashers import get_hasher
+from django.urls import get_resolver
+
+
+def warm_up():
+    """
+    Does the work Django otherwise leaves to the first requests served by a worker: imports the
+    URLconf, and with it every view, and loads the library of the preferred password hasher
+    (e.g. argon2-cffi), which the first login would load. With gunicorn's preload_app (see
+    gunicorn.conf.py) this runs once in the master process and is shared by all the workers.
+    """
+    get_resolver().url_patterns
+    hasher = get_hasher()
+    if hasher.library:
+        hasher._load_library()
@@ -0,0 +1,13 @@
+from django.test.runner import DiscoverRunner, get_max_test_processes
+
+
+class ParallelDiscoverRunner(DiscoverRunner):
+    """
+    Django's test runner, running the test classes in parallel by default: one process per core,
+    or DJANGO_TEST_PROCESSES processes. Every process gets its own copy of the test database.
+    Use --parallel 1 to run the tests in a single process, e.g. to debug one.
+    """
+
+    def __init__(self, parallel=0, **kwargs):
+        # 0 when --parallel isn't given
+        super().__init__(parallel=parallel or get_max_test_processes(), **kwargs)
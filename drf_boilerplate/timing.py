@@ -0,0 +1,46 @@
+"""
+Time spent by a request, by kind of work. Recorded by drf_boilerplate.middleware.RequestTimingMiddleware
+and added to by the code doing the work, e.g. the password hashers. It only depends on the standard
+library, so it can be imported without loading the middleware.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Time spent by one request, by kind of work. Stored in a context variable, so work done for the
+    request in other threads (sync_to_async, the hashing pool) is recorded as well.
+    """
+
+    def __init__(self):
+        self.durations = {'db': 0.0, 'hashing': 0.0}
+        self.counts = {'db': 0, 'hashing': 0}
+        self._active = set()
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+
+@contextmanager
+def timing(name):
+    """
+    Adds the time spent in the block to the current request's timings under the given name. Does
+    nothing outside of a timed request, or when nested in a block of the same name.
+    """
+    timings = _current_timings.get()
+    if timings is None or name in timings._active:
+        yield
+        return
+
+    timings._active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._active.discard(name)
+        timings.add(name, time.perf_counter() - started)
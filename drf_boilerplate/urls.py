@@ -15,9 +15,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path
 
+from .urls_api import urlpatterns as api_urlpatterns
+
+# The API and the admin. API-only workers use drf_boilerplate/urls_api.py instead
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('account/', include('Users.url'))
-]
+] + api_urlpatterns
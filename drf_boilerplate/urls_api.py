@@ -0,0 +1,14 @@
+"""
+URL configuration of the API, without the admin. It is the ROOT_URLCONF of API-only workers
+(api_only=True); drf_boilerplate/urls.py adds the admin to it for the other workers.
+"""
+from django.urls import path, include
+
+from .metrics import metrics_view
+from .views import DatabasePoolStatsView
+
+urlpatterns = [
+    path('account/', include('Users.url')),
+    path('status/db-pool/', DatabasePoolStatsView.as_view(), name='db_pool_stats'),
+    path('metrics/', metrics_view, name='metrics'),
+]
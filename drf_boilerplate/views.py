@@ -0,0 +1,17 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .db import get_pool_stats
+
+
+class DatabasePoolStatsView(APIView):
+    """
+    Shows the database connection pool statistics of the worker process serving the request.
+    Only available to staff users.
+    """
+    http_method_names = ['get']
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response({'data': get_pool_stats()})
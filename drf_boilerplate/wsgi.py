@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from .startup import warm_up
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'drf_boilerplate.settings.common')
 
 application = get_wsgi_application()
+
+# Import the views now rather than in the first request
+warm_up()
@@ -0,0 +1,31 @@
+# gunicorn settings, read from the working directory when gunicorn starts.
+# The hooks are for the Prometheus multiprocess mode, see drf_boilerplate/metrics.py.
+import glob
+import os
+
+# Load the project once in the master process and fork the workers from it, instead of every worker
+# importing it on its own (see drf_boilerplate/startup.py). Workers serve their first request within
+# milliseconds and share the memory of the imported code. Nothing may open a database connection or
+# start a thread while the project loads, it would be shared by the forked workers. Code changes need
+# a restart rather than a HUP, which reloads the workers from the already loaded code.
+preload_app = True
+
+# Seconds a worker may spend on a request before the master kills it. The settings read the same
+# variable to size the work done within a request, e.g. BULK_IMPORT's MAX_UPLOAD_ROWS.
+timeout = int(os.getenv('worker_timeout', '30'))
+
+
+def on_starting(server):
+    # Metrics of a previous run must not be added to the new ones
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    # Drops the live gauges of the exited worker, its counters and histograms are kept
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)